@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ApiBuldingsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "api_buldings"
+
+    def ready(self):
+        from api_buldings import instrumentation, signals  # noqa: F401
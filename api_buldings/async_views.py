@@ -0,0 +1,51 @@
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_safe
+from rest_framework.exceptions import ValidationError
+
+from api_buldings.filters import BuildingFilter
+from api_buldings.models import Building
+from api_buldings.renderers import ORJSONRenderer
+from api_buldings.replicas import get_read_database
+from api_buldings.serializers import BuildingSerializer
+from api_buldings.views import build_serializer_context, etag_matches, make_etag
+
+
+def filter_buildings(query_params, database):
+    filterset = BuildingFilter(data=query_params, queryset=Building.objects.using(database))
+    if not filterset.is_valid():
+        raise ValidationError(filterset.errors)
+    return filterset.qs
+
+
+@require_safe
+async def building_list(request):
+    try:
+        context = build_serializer_context(request.GET, geometry_options=True)
+        queryset = filter_buildings(request.GET, get_read_database(request))
+    except ValidationError as e:
+        return JsonResponse(e.detail, status=400, safe=False)
+
+    serializer = BuildingSerializer(context=context, single=False)
+    return StreamingHttpResponse(serializer.ato_representation_stream(queryset), content_type="application/json")
+
+
+@require_safe
+async def building_retrieve(request, pk):
+    try:
+        context = build_serializer_context(request.GET, geometry_options=True)
+    except ValidationError as e:
+        return JsonResponse(e.detail, status=400, safe=False)
+
+    serializer = BuildingSerializer(context=context)
+    queryset = Building.objects.using(get_read_database(request)).filter(pk=pk)
+    instance = await serializer.change_queryset_serializers_context(queryset).afirst()
+    if instance is None:
+        return JsonResponse({"detail": "No Building matches the given query."}, status=404)
+
+    etag = make_etag(instance.pk, instance.version, ORJSONRenderer.format, request.GET)
+    if etag_matches(request, etag):
+        response = HttpResponseNotModified()
+        response["ETag"] = etag
+        return response
+    return HttpResponse(ORJSONRenderer().render(serializer.to_representation(instance)),
+                        content_type="application/json", headers={"ETag": etag})
@@ -0,0 +1,93 @@
+from django.db import connection, transaction
+from rest_framework.exceptions import ValidationError
+
+from api_buldings.models import Building, BuildingChange
+from api_buldings.serializers import BuildingSerializer
+
+BULK_BATCH_SIZE = 1000
+
+
+def get_features(data):
+    if isinstance(data, dict) and data.get("type") == "FeatureCollection":
+        data = data.get("features")
+    if not isinstance(data, list):
+        raise ValidationError({"detail": "wrong format"})
+    return data
+
+
+def validate_batch(batch, seen_ids, errors):
+    buildings = []
+    for index, feature in batch:
+        if not isinstance(feature, dict):
+            errors.append({"index": index, "errors": {"detail": ["wrong format"]}})
+            continue
+
+        pk = feature.get("id")
+        if pk is not None and (not isinstance(pk, int) or isinstance(pk, bool) or pk <= 0):
+            errors.append({"index": index, "errors": {"id": ["id must be a positive integer"]}})
+            continue
+        if pk is not None and pk in seen_ids:
+            errors.append({"index": index, "errors": {"id": ["duplicate id"]}})
+            continue
+
+        serializer = BuildingSerializer(data=feature)
+        if not serializer.is_valid():
+            errors.append({"index": index, "errors": serializer.errors})
+            continue
+
+        if pk is not None:
+            seen_ids.add(pk)
+        buildings.append(Building(pk=pk, **serializer.validated_data))
+    return buildings
+
+
+def reserve_ids(max_id):
+    # Moves the id sequence past the explicit ids of the request, so generated ids can't collide with them.
+    meta = Building._meta
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_get_serial_sequence(%s, %s)", [meta.db_table, meta.pk.column])
+        (sequence,) = cursor.fetchone()
+        cursor.execute(f"SELECT setval(%s, GREATEST(%s, last_value)) FROM {sequence}", [sequence, max_id])
+
+
+def upsert_buildings(features, batch_size=BULK_BATCH_SIZE):
+    created, updated, errors = [], [], []
+    extents = []
+    seen_ids = set()
+
+    with transaction.atomic():
+        max_id = max((feature["id"] for feature in features if isinstance(feature, dict)
+                      and isinstance(feature.get("id"), int) and not isinstance(feature["id"], bool)), default=0)
+        if max_id > 0:
+            reserve_ids(max_id)
+
+        for start in range(0, len(features), batch_size):
+            batch = enumerate(features[start:start + batch_size], start)
+            buildings = validate_batch(batch, seen_ids, errors)
+            if not buildings:
+                continue
+
+            explicit = [building for building in buildings if building.pk is not None]
+            existing = Building.objects.filter(pk__in=[building.pk for building in explicit]).values_list("pk", "geom")
+            existing_ids = set()
+            for pk, geom in existing:
+                existing_ids.add(pk)
+                extents.append(geom.extent)
+
+            if explicit:
+                Building.objects.bulk_create(explicit, batch_size=batch_size, update_conflicts=True,
+                                             unique_fields=["id"], update_fields=["address", "geom"])
+            generated = [building for building in buildings if building.pk is None]
+            if generated:
+                Building.objects.bulk_create(generated, batch_size=batch_size)
+            ids = [building.pk for building in buildings]
+            Building.objects.filter(pk__in=ids).update_area()
+
+            for building in buildings:
+                (updated if building.pk in existing_ids else created).append(building.pk)
+                extents.append(building.geom.extent)
+
+        BuildingChange.objects.record(created, BuildingChange.Action.CREATED)
+        BuildingChange.objects.record(updated, BuildingChange.Action.UPDATED)
+
+    return {"created": created, "updated": updated, "errors": errors}, extents
@@ -0,0 +1,173 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models import Max
+
+from api_buldings.models import BuildingChange
+
+
+class LRUCache:
+    def __init__(self, max_entries, timeout=None):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self.lock:
+            try:
+                expires, value = self.entries[key]
+            except KeyError:
+                return default
+            if expires is not None and expires < time.monotonic():
+                del self.entries[key]
+                return default
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        expires = time.monotonic() + self.timeout if self.timeout is not None else None
+        with self.lock:
+            self.entries[key] = (expires, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def delete_if(self, predicate):
+        with self.lock:
+            keys = [key for key in self.entries if predicate(key)]
+            for key in keys:
+                del self.entries[key]
+        return len(keys)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class LocalCacheBackend:
+    def __init__(self, max_entries=256, timeout=300):
+        self.entries = LRUCache(max_entries, timeout=timeout)
+        self.generation = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def set(self, key, value):
+        self.entries.set(key, value)
+
+    def get_generation(self):
+        return self.generation
+
+    def bump_generation(self):
+        with self.lock:
+            self.generation += 1
+            return self.generation
+
+
+class ChangesGenerationBackend(LocalCacheBackend):
+    # Entries stay in the process, but the generation includes the latest committed BuildingChange, so
+    # writes handled by other workers or import_buildings invalidate this worker too (one indexed query).
+    def get_generation(self):
+        latest = BuildingChange.objects.aggregate(latest=Max("pk"))["latest"]
+        return self.generation, latest
+
+
+class DjangoCacheBackend:
+    generation_key = "buildings:generation"
+
+    def __init__(self, alias="default", timeout=300):
+        from django.core.cache import caches
+
+        self.cache = caches[alias]
+        self.timeout = timeout
+
+    def get(self, key):
+        return self.cache.get(f"buildings:response:{key}")
+
+    def set(self, key, value):
+        self.cache.set(f"buildings:response:{key}", value, self.timeout)
+
+    def get_generation(self):
+        generation = self.cache.get(self.generation_key)
+        if generation is None:
+            self.cache.add(self.generation_key, 0, None)
+            generation = self.cache.get(self.generation_key, 0)
+        return generation
+
+    def bump_generation(self):
+        try:
+            return self.cache.incr(self.generation_key)
+        except ValueError:
+            self.cache.add(self.generation_key, 0, None)
+            return self.cache.incr(self.generation_key)
+
+
+class ResponseCache:
+    backends = {
+        "local": LocalCacheBackend,
+        "database": ChangesGenerationBackend,
+        "django": DjangoCacheBackend,
+    }
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, options):
+        options = dict(options)
+        backend = options.pop("BACKEND", "local")
+        backend_class = cls.backends.get(backend)
+        if backend_class is None:
+            from django.utils.module_loading import import_string
+
+            backend_class = import_string(backend)
+        return cls(backend_class(**{key.lower(): value for key, value in options.items()}))
+
+    def make_key(self, *parts):
+        key = repr((self.backend.get_generation(), parts))
+        return hashlib.sha1(key.encode()).hexdigest()
+
+    def get(self, key):
+        value = self.backend.get(key)
+        with self.lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self.backend.set(key, value)
+
+    def invalidate(self):
+        return self.backend.bump_generation()
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "generation": self.backend.get_generation()}
+
+
+def normalize_params(query_params):
+    params = []
+    for key, values in sorted(query_params.lists()):
+        normalized = []
+        for value in values:
+            try:
+                normalized.append(repr(float(value)))
+            except ValueError:
+                normalized.append(value)
+        params.append((key, tuple(normalized)))
+    return tuple(params)
+
+
+response_cache = ResponseCache.from_settings(getattr(settings, "BUILDINGS_RESPONSE_CACHE", {}))
@@ -0,0 +1,21 @@
+from api_buldings.models import BuildingChange
+
+CHANGES_PAGE_SIZE = 1000
+CHANGES_MAX_PAGE_SIZE = 10000
+
+
+def get_changes(since=0, limit=CHANGES_PAGE_SIZE):
+    changes = list(BuildingChange.objects.filter(pk__gt=since).order_by("pk")
+                   .values_list("pk", "building_id", "action")[:limit + 1])
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    # only the latest change of each building in the page matters
+    latest = {}
+    for _, building_id, action in changes:
+        latest.pop(building_id, None)
+        latest[building_id] = action
+    changed = [pk for pk, action in latest.items() if action != BuildingChange.Action.DELETED]
+    deleted = [pk for pk, action in latest.items() if action == BuildingChange.Action.DELETED]
+    cursor = changes[-1][0] if changes else since
+    return changed, deleted, cursor, has_more
@@ -0,0 +1,181 @@
+import io
+import json
+
+from django.contrib.gis.db.models.functions import AsGeoJSON, AsWKB, Distance
+
+from api_buldings import flatgeobuf
+from api_buldings.renderers import RawJSON, dumps
+from api_buldings.serializers import GEOJSON_PRECISION
+from api_buldings.validators import wkb_rings
+
+EXPORT_CHUNK_SIZE = 2000
+STREAM_BUFFER_SIZE = 1 << 16
+GEOMETRY_CRS = "OGC:CRS84"
+
+
+class StreamSink(io.RawIOBase):
+    # write-only file object for the Arrow writers, the written bytes are taken out with pop()
+    def __init__(self):
+        super().__init__()
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def pop(self):
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def iter_geojsonl(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    rows = (queryset.annotate(geojson=AsGeoJSON("geom", precision=GEOJSON_PRECISION))
+            .values_list("pk", "address", "area", "geojson"))
+    for pk, address, area, geojson in rows.iterator(chunk_size=chunk_size):
+        properties = {"address": address}
+        if area is not None:
+            properties["area"] = area
+        feature = {
+            "type": "Feature",
+            "geometry": RawJSON(geojson),
+            "id": pk,
+            "properties": properties
+        }
+        yield dumps(feature) + "\n"
+
+
+def iter_rows(queryset, target_point=None, chunk_size=EXPORT_CHUNK_SIZE):
+    # (pk, address, area, distance in meters or None, WKB encoded by PostGIS)
+    if not queryset.ordered:
+        queryset = queryset.order_by("pk")
+    queryset = queryset.annotate(wkb=AsWKB("geom"))
+    if target_point is None:
+        rows = queryset.values_list("pk", "address", "area", "wkb")
+        for pk, address, area, wkb in rows.iterator(chunk_size=chunk_size):
+            yield pk, address, area, None, bytes(wkb)
+    else:
+        rows = queryset.annotate(target_distance=Distance("geom", target_point)).values_list(
+            "pk", "address", "area", "target_distance", "wkb")
+        for pk, address, area, distance, wkb in rows.iterator(chunk_size=chunk_size):
+            yield pk, address, area, distance.m, bytes(wkb)
+
+
+def arrow_schema(with_distance=False, geoparquet=False):
+    import pyarrow as pa
+
+    fields = [pa.field("id", pa.int64(), nullable=False), pa.field("address", pa.string()),
+              pa.field("area", pa.float64())]
+    if with_distance:
+        fields.append(pa.field("distance", pa.float64()))
+    geometry_metadata = None
+    if not geoparquet:
+        geometry_metadata = {"ARROW:extension:name": "geoarrow.wkb",
+                             "ARROW:extension:metadata": json.dumps({"crs": GEOMETRY_CRS})}
+    fields.append(pa.field("geometry", pa.binary(), nullable=False, metadata=geometry_metadata))
+
+    metadata = None
+    if geoparquet:
+        metadata = {"geo": json.dumps({
+            "version": "1.0.0",
+            "primary_column": "geometry",
+            "columns": {"geometry": {"encoding": "WKB", "geometry_types": ["Polygon"]}},
+        })}
+    return pa.schema(fields, metadata=metadata)
+
+
+def iter_record_batches(queryset, schema, target_point=None, chunk_size=EXPORT_CHUNK_SIZE):
+    import pyarrow as pa
+
+    columns = [[] for _ in schema]
+    with_distance = target_point is not None
+    for pk, address, area, distance, wkb in iter_rows(queryset, target_point, chunk_size):
+        row = (pk, address, area, distance, wkb) if with_distance else (pk, address, area, wkb)
+        for column, value in zip(columns, row):
+            column.append(value)
+        if len(columns[0]) >= chunk_size:
+            yield pa.record_batch(columns, schema=schema)
+            columns = [[] for _ in schema]
+    if columns[0]:
+        yield pa.record_batch(columns, schema=schema)
+
+
+def iter_geoarrow_ipc(queryset, target_point=None, chunk_size=EXPORT_CHUNK_SIZE):
+    import pyarrow as pa
+
+    schema = arrow_schema(with_distance=target_point is not None)
+    sink = StreamSink()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        for batch in iter_record_batches(queryset, schema, target_point, chunk_size):
+            writer.write_batch(batch)
+            yield sink.pop()
+    yield sink.pop()
+
+
+def iter_geoparquet(queryset, target_point=None, chunk_size=EXPORT_CHUNK_SIZE):
+    # one row group per record batch, sent as soon as it is written; the footer comes last
+    import pyarrow.parquet as pq
+
+    schema = arrow_schema(with_distance=target_point is not None, geoparquet=True)
+    sink = StreamSink()
+    with pq.ParquetWriter(sink, schema, compression="zstd") as writer:
+        for batch in iter_record_batches(queryset, schema, target_point, chunk_size):
+            writer.write_batch(batch)
+            yield sink.pop()
+    yield sink.pop()
+
+
+def iter_flatgeobuf(queryset, target_point=None, chunk_size=EXPORT_CHUNK_SIZE):
+    columns = [("id", flatgeobuf.LONG), ("address", flatgeobuf.STRING), ("area", flatgeobuf.DOUBLE)]
+    if target_point is not None:
+        columns.append(("distance", flatgeobuf.DOUBLE))
+    buffer = bytearray(flatgeobuf.header("buildings", columns))
+    for pk, address, area, distance, wkb in iter_rows(queryset, target_point, chunk_size):
+        buffer += flatgeobuf.polygon_feature(wkb_rings(wkb), columns, (pk, address, area, distance))
+        if len(buffer) >= STREAM_BUFFER_SIZE:
+            yield bytes(buffer)
+            buffer.clear()
+    yield bytes(buffer)
+
+
+def write_flatgeobuf(queryset, path, spatial_index=False, chunk_size=EXPORT_CHUNK_SIZE, target_point=None):
+    from osgeo import ogr, osr
+
+    srs = osr.SpatialReference()
+    srs.ImportFromEPSG(4326)
+    srs.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+
+    dataset = ogr.GetDriverByName("FlatGeobuf").CreateDataSource(path)
+    layer = dataset.CreateLayer("buildings", srs, ogr.wkbPolygon,
+                                options=[f"SPATIAL_INDEX={'YES' if spatial_index else 'NO'}"])
+    layer.CreateField(ogr.FieldDefn("id", ogr.OFTInteger64))
+    layer.CreateField(ogr.FieldDefn("address", ogr.OFTString))
+    layer.CreateField(ogr.FieldDefn("area", ogr.OFTReal))
+    if target_point is not None:
+        layer.CreateField(ogr.FieldDefn("distance", ogr.OFTReal))
+    definition = layer.GetLayerDefn()
+
+    count = 0
+    for pk, address, area, distance, wkb in iter_rows(queryset, target_point, chunk_size):
+        feature = ogr.Feature(definition)
+        feature.SetField("id", pk)
+        feature.SetField("address", address)
+        if area is not None:
+            feature.SetField("area", area)
+        if distance is not None:
+            feature.SetField("distance", distance)
+        feature.SetGeometry(ogr.CreateGeometryFromWkb(wkb))
+        layer.CreateFeature(feature)
+        count += 1
+
+    dataset.FlushCache()
+    del layer, dataset
+    return count
@@ -1,40 +1,99 @@
-from django.contrib.gis.db.models.functions import Distance, Area
 import django_filters
-from django.contrib.gis.geos import Point
-from django.contrib.gis.measure import Area as AreaMeasure
+from django.contrib.gis.geos import Point, Polygon
+from django.contrib.gis.db.models import PointField
+from django.contrib.gis.db.models.functions import Distance
+from django.contrib.gis.measure import D
+from django.db.models import F, FloatField, Func, Q, Value
+from rest_framework.exceptions import ValidationError
 
-from api_buldings.models import Building
+from api_buldings.models import Building, planar_geom
+
+
+NEAREST_MAX_COUNT = 1000
+NEAREST_CANDIDATES_FACTOR = 4
+
+
+class NumberCSVFilter(django_filters.BaseCSVFilter, django_filters.NumberFilter):
+    pass
+
+
+class KNNDistance(Func):
+    arg_joiner = " <-> "
+    template = "%(expressions)s"
+    output_field = FloatField()
+
+    def __init__(self, expression, point, **extra):
+        super().__init__(F(expression), Value(point, output_field=PointField(geography=True)), **extra)
 
 
 class BuildingFilter(django_filters.FilterSet):
     max_distance = django_filters.NumberFilter(method='filter_max_distance')
     min_area = django_filters.NumberFilter(method='filter_min_area')
     max_area = django_filters.NumberFilter(method='filter_max_area')
+    bbox = NumberCSVFilter(method='filter_bbox')
+    # Declared last so the k nearest are picked from the already filtered rows.
+    nearest = django_filters.NumberFilter(method='filter_nearest')
 
     class Meta:
         model = Building
-        fields = ['max_distance', 'min_area', 'max_area']
+        fields = ['max_distance', 'min_area', 'max_area', 'bbox', 'nearest']
+
+    def get_ref_point(self):
+        longitude = self.data.get('longitude')
+        latitude = self.data.get('latitude')
+
+        if longitude and latitude:
+            return Point(float(longitude), float(latitude), srid=4326)
+        return None
 
     def filter_max_distance(self, queryset, name, value):
-        longitude = self.request.GET.get('longitude')
-        latitude = self.request.GET.get('latitude')
+        ref_point = self.get_ref_point()
 
-        if longitude and latitude and value:
-            ref_point = Point(float(longitude), float(latitude), srid=4326)
-            queryset = self.queryset.annotate(distance=Distance('geom', ref_point))
-            queryset = queryset.filter(distance__lt=int(value))
+        if ref_point and value:
+            queryset = queryset.filter(geom__dwithin=(ref_point, D(m=int(value))))
         return queryset
 
     def filter_min_area(self, queryset, name, value):
         if value:
-            queryset = queryset.annotate(area=Area('geom'))
-            value_as_area = AreaMeasure(sq_m=int(value))
-            queryset = queryset.filter(area__gte=value_as_area)
+            queryset = queryset.filter(area__gte=int(value))
         return queryset
 
     def filter_max_area(self, queryset, name, value):
         if value:
-            queryset = queryset.annotate(area=Area('geom'))
-            value_as_area = AreaMeasure(sq_m=int(value))
-            queryset = queryset.filter(area__lte=value_as_area)
+            queryset = queryset.filter(area__lte=int(value))
+        return queryset
+
+    def filter_bbox(self, queryset, name, value):
+        if not value:
+            return queryset
+        if len(value) != 4:
+            raise ValidationError({"bbox": "Expected minLon,minLat,maxLon,maxLat"})
+
+        min_lon, min_lat, max_lon, max_lat = map(float, value)
+        if not (-180 <= min_lon <= 180 and -180 <= max_lon <= 180
+                and -90 <= min_lat <= max_lat <= 90):
+            raise ValidationError({"bbox": "Coordinates out of range"})
+
+        if min_lon <= max_lon:
+            boxes = [(min_lon, min_lat, max_lon, max_lat)]
+        else:
+            boxes = [(min_lon, min_lat, 180, max_lat), (-180, min_lat, max_lon, max_lat)]
+
+        condition = Q()
+        for box in boxes:
+            envelope = Polygon.from_bbox(box)
+            envelope.srid = 4326
+            condition |= Q(planar_geom__intersects=envelope)
+        return queryset.alias(planar_geom=planar_geom()).filter(condition)
+
+    def filter_nearest(self, queryset, name, value):
+        ref_point = self.get_ref_point()
+        count = min(int(value), NEAREST_MAX_COUNT) if value else 0
+
+        if ref_point and count > 0:
+            # <-> on geography is index assisted but uses sphere distance, re-rank candidates on the spheroid.
+            candidates = queryset.order_by(KNNDistance('geom', ref_point)).values('pk')
+            nearest = (Building.objects.filter(pk__in=candidates[:count * NEAREST_CANDIDATES_FACTOR])
+                       .order_by(Distance('geom', ref_point), 'pk').values('pk'))
+            queryset = queryset.filter(pk__in=nearest[:count]).order_by(Distance('geom', ref_point), 'pk')
         return queryset
@@ -0,0 +1,131 @@
+"""Streaming FlatGeobuf writer (https://flatgeobuf.org), without a spatial index.
+
+A file is the magic bytes, a size prefixed Header flatbuffer, then size prefixed Feature flatbuffers,
+so features can be sent as soon as they are read. features_count 0 in the header means "unknown".
+"""
+import struct
+
+import numpy as np
+
+MAGIC = b"fgb\x03fgb\x00"
+POLYGON = 3
+LONG, DOUBLE, STRING = 7, 10, 11
+
+
+class Table:
+    # field slot -> (struct format, value) for scalars, or str / bytes / Vector / Table / list of Table
+    def __init__(self, slots):
+        self.slots = slots
+
+
+class Vector:
+    def __init__(self, element_format, data):
+        self.element_format = element_format
+        self.data = data
+
+
+def pad(buffer, alignment, offset=0):
+    buffer += bytes(-(len(buffer) + offset) % alignment)
+
+
+def write_object(buffer, value):
+    # Objects are laid out front to back, children after their parent, so every uoffset is positive.
+    if isinstance(value, Table):
+        return write_table(buffer, value)
+    if isinstance(value, list):
+        pad(buffer, 4)
+        position = len(buffer)
+        buffer += struct.pack("<I", len(value)) + bytes(4 * len(value))
+        for index, table in enumerate(value):
+            field = position + 4 + 4 * index
+            struct.pack_into("<I", buffer, field, write_table(buffer, table) - field)
+        return position
+    if isinstance(value, Vector):
+        size = struct.calcsize(value.element_format)
+        pad(buffer, max(size, 4), 4)
+        position = len(buffer)
+        buffer += struct.pack("<I", len(value.data) // size)
+        buffer += value.data
+        return position
+    data = value.encode() if isinstance(value, str) else value
+    pad(buffer, 4)
+    position = len(buffer)
+    buffer += struct.pack("<I", len(data)) + data + b"\0"
+    return position
+
+
+def write_table(buffer, table):
+    layout, offset, alignment = {}, 4, 4
+    for slot, value in sorted(table.slots.items(), key=lambda item: -field_size(item[1])):
+        size = field_size(value)
+        offset += -offset % size
+        layout[slot] = offset
+        offset += size
+        alignment = max(alignment, size)
+
+    vtable = [0] * (max(table.slots) + 1 if table.slots else 0)
+    for slot, field_offset in layout.items():
+        vtable[slot] = field_offset
+    pad(buffer, 2)
+    vtable_position = len(buffer)
+    buffer += struct.pack(f"<HH{len(vtable)}H", 4 + 2 * len(vtable), offset, *vtable)
+    pad(buffer, alignment)
+    position = len(buffer)
+    buffer += struct.pack("<i", position - vtable_position) + bytes(offset - 4)
+
+    children = []
+    for slot, value in table.slots.items():
+        if isinstance(value, tuple):
+            struct.pack_into("<" + value[0], buffer, position + layout[slot], value[1])
+        else:
+            children.append((position + layout[slot], value))
+    for field, value in children:
+        struct.pack_into("<I", buffer, field, write_object(buffer, value) - field)
+    return position
+
+
+def field_size(value):
+    return struct.calcsize(value[0]) if isinstance(value, tuple) else 4
+
+
+def finish(table):
+    buffer = bytearray(4)
+    struct.pack_into("<I", buffer, 0, write_table(buffer, table))
+    pad(buffer, 8)
+    return struct.pack("<I", len(buffer)) + buffer
+
+
+def header(name, columns, srid=4326):
+    # Header: geometry_type, columns, features_count, index_node_size, crs, name
+    return MAGIC + finish(Table({
+        0: name,
+        2: ("B", POLYGON),
+        7: [Table({0: column_name, 1: ("B", column_type)}) for column_name, column_type in columns],
+        8: ("Q", 0),
+        9: ("H", 0),
+        10: Table({0: "EPSG", 1: ("i", srid)}),
+    }))
+
+
+def encode_properties(columns, values):
+    properties = bytearray()
+    for index, ((_, column_type), value) in enumerate(zip(columns, values)):
+        if value is None:
+            continue
+        properties += struct.pack("<H", index)
+        if column_type == LONG:
+            properties += struct.pack("<q", value)
+        elif column_type == DOUBLE:
+            properties += struct.pack("<d", value)
+        else:
+            data = value.encode()
+            properties += struct.pack("<I", len(data)) + data
+    return bytes(properties)
+
+
+def polygon_feature(rings, columns, values):
+    # Geometry: ends (only needed with holes), xy; Feature: geometry, properties
+    geometry = Table({1: Vector("d", np.concatenate(rings).astype("<f8", copy=False).tobytes())})
+    if len(rings) > 1:
+        geometry.slots[0] = Vector("I", np.cumsum([len(ring) for ring in rings], dtype="<u4").tobytes())
+    return finish(Table({0: geometry, 1: Vector("B", encode_properties(columns, values))}))
@@ -0,0 +1,282 @@
+import ipaddress
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseForbidden
+
+from api_buldings.cache import response_cache
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+METRICS_ALLOWED_IPS = ("127.0.0.1", "::1")
+
+current_metrics = ContextVar("current_metrics", default=None)
+
+
+class RequestMetrics:
+    __slots__ = ("started", "queries", "db", "serialize", "render", "rows")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db = 0.0
+        self.serialize = 0.0
+        self.render = 0.0
+        self.rows = 0
+
+
+class Histogram:
+    def __init__(self, name, documentation, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, label, value):
+        with self.lock:
+            counts = self.series.get(label)
+            if counts is None:
+                counts = self.series[label] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[bisect_left(self.buckets, value)] += 1
+            counts[-1] += value
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            series = {label: list(counts) for label, counts in self.series.items()}
+        for label, counts in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{action="{label}",le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{action="{label}"}} {counts[-1]}')
+            lines.append(f'{self.name}_count{{action="{label}"}} {cumulative}')
+        return lines
+
+
+class Counter:
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def inc(self, label, value=1):
+        with self.lock:
+            self.series[label] = self.series.get(label, 0) + value
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            series = dict(self.series)
+        for label, value in sorted(series.items()):
+            lines.append(f'{self.name}{{action="{label}"}} {value}')
+        return lines
+
+
+request_duration = Histogram("buildings_request_duration_seconds", "Time spent in the view and rendering.")
+db_duration = Histogram("buildings_db_duration_seconds", "Time spent executing SQL per request.")
+serialize_duration = Histogram("buildings_serialize_duration_seconds", "Serializer time per request, without SQL.")
+render_duration = Histogram("buildings_render_duration_seconds", "Renderer time per request.")
+queries_total = Counter("buildings_db_queries_total", "SQL statements executed.")
+rows_total = Counter("buildings_rows_total", "Buildings serialized.")
+METRICS = (request_duration, db_duration, serialize_duration, render_duration, queries_total, rows_total)
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.db += time.perf_counter() - started
+        metrics.queries += 1
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@contextmanager
+def timed(name):
+    # SQL run inside the block (lazy querysets) is already counted as db time, it is left out here.
+    metrics = current_metrics.get()
+    if metrics is None:
+        yield
+        return
+    started, db = time.perf_counter(), metrics.db
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started - (metrics.db - db)
+        setattr(metrics, name, getattr(metrics, name) + elapsed)
+
+
+def record_rows(count):
+    metrics = current_metrics.get()
+    if metrics is not None:
+        metrics.rows += count
+
+
+def iter_measured(content, metrics, finish):
+    # the metrics are current only while a chunk is produced, chunks may come from different threads
+    iterator = iter(content)
+    try:
+        while True:
+            token = current_metrics.set(metrics)
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                current_metrics.reset(token)
+            yield chunk
+    finally:
+        finish()
+
+
+async def aiter_measured(content, metrics, finish):
+    iterator = aiter(content)
+    try:
+        while True:
+            token = current_metrics.set(metrics)
+            try:
+                chunk = await anext(iterator)
+            except StopAsyncIteration:
+                return
+            finally:
+                current_metrics.reset(token)
+            yield chunk
+    finally:
+        finish()
+
+
+def get_action(request):
+    match = request.resolver_match
+    if match is None:
+        return "unmatched"
+    actions = getattr(match.func, "actions", None)
+    if actions:
+        return actions.get(request.method.lower(), match.url_name)
+    return match.url_name or match.view_name
+
+
+class InstrumentationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.finish(request, response, metrics)
+
+    def finish(self, request, response, metrics):
+        if response.streaming:
+            # The body (and its SQL) is produced while the server sends it, so the request is recorded when
+            # the iterator ends. Headers are already sent by then, streaming responses get no Server-Timing.
+            finish = partial(self.record, request, response, metrics)
+            if response.is_async:
+                response.streaming_content = aiter_measured(response.streaming_content, metrics, finish)
+            else:
+                response.streaming_content = iter_measured(response.streaming_content, metrics, finish)
+            return response
+
+        total = self.record(request, response, metrics)
+        response["Server-Timing"] = ", ".join((
+            f'db;dur={metrics.db * 1e3:.2f};desc="{metrics.queries} queries"',
+            f"serialize;dur={metrics.serialize * 1e3:.2f}",
+            f"render;dur={metrics.render * 1e3:.2f}",
+            f"total;dur={total * 1e3:.2f}",
+        ))
+        return response
+
+    def record(self, request, response, metrics):
+        total = time.perf_counter() - metrics.started
+        action = get_action(request)
+
+        request_duration.observe(action, total)
+        db_duration.observe(action, metrics.db)
+        serialize_duration.observe(action, metrics.serialize)
+        render_duration.observe(action, metrics.render)
+        queries_total.inc(action, metrics.queries)
+        rows_total.inc(action, metrics.rows)
+
+        logger.info(json.dumps({
+            "method": request.method,
+            "path": request.path,
+            "action": action,
+            "status": response.status_code,
+            "queries": metrics.queries,
+            "rows": metrics.rows,
+            "db_ms": round(metrics.db * 1e3, 3),
+            "serialize_ms": round(metrics.serialize * 1e3, 3),
+            "render_ms": round(metrics.render * 1e3, 3),
+            "total_ms": round(total * 1e3, 3),
+        }))
+        return total
+
+
+def metrics_allowed(request):
+    if getattr(request, "user", None) is not None and request.user.is_staff:
+        return True
+    try:
+        address = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        return False
+    return any(address in ipaddress.ip_network(network, strict=False)
+               for network in getattr(settings, "BUILDINGS_METRICS_ALLOWED_IPS", METRICS_ALLOWED_IPS))
+
+
+def metrics_view(request):
+    if not metrics_allowed(request):
+        return HttpResponseForbidden()
+    lines = []
+    for metric in METRICS:
+        lines += metric.expose()
+    stats = response_cache.stats()
+    lines += [
+        "# HELP buildings_response_cache_hits_total Response cache hits.",
+        "# TYPE buildings_response_cache_hits_total counter",
+        f"buildings_response_cache_hits_total {stats['hits']}",
+        "# HELP buildings_response_cache_misses_total Response cache misses.",
+        "# TYPE buildings_response_cache_misses_total counter",
+        f"buildings_response_cache_misses_total {stats['misses']}",
+    ]
+    return HttpResponse("\n".join(lines) + "\n", content_type=PROMETHEUS_CONTENT_TYPE)
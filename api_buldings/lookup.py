@@ -0,0 +1,59 @@
+from django.db import connection
+
+from api_buldings.models import Building
+
+LOOKUP_MAX_POINTS = 50000
+LOOKUP_MAX_NEIGHBOURS = 100
+# Candidates taken from the index ordered by <-> (sphere) before the exact spheroid re-rank.
+LOOKUP_CANDIDATES_FACTOR = 4
+
+NEAREST_SQL = """
+SELECT p.ord, b.id, b.address, b.distance
+FROM unnest(%s::float8[], %s::float8[]) WITH ORDINALITY AS p(lon, lat, ord)
+CROSS JOIN LATERAL (SELECT ST_SetSRID(ST_MakePoint(p.lon, p.lat), 4326)::geography AS geog) AS q
+CROSS JOIN LATERAL (
+    SELECT c.id, c.address, ST_Distance(c.geom, q.geog) AS distance
+    FROM (
+        SELECT id, address, geom FROM {table}
+        WHERE %s::float8 IS NULL OR ST_DWithin(geom, q.geog, %s::float8)
+        ORDER BY geom <-> q.geog
+        LIMIT %s
+    ) AS c
+    ORDER BY distance, c.id
+    LIMIT %s
+) AS b
+ORDER BY p.ord, b.distance, b.id
+"""
+
+CONTAINS_SQL = """
+SELECT p.ord, b.id, b.address, 0.0
+FROM unnest(%s::float8[], %s::float8[]) WITH ORDINALITY AS p(lon, lat, ord)
+CROSS JOIN LATERAL (
+    SELECT id, address FROM {table}
+    WHERE ST_Covers(geom, ST_SetSRID(ST_MakePoint(p.lon, p.lat), 4326)::geography)
+    ORDER BY id
+    LIMIT %s
+) AS b
+ORDER BY p.ord, b.id
+"""
+
+
+def lookup_points(points, mode="nearest", k=1, max_distance=None):
+    table = connection.ops.quote_name(Building._meta.db_table)
+    longitudes = [float(point[0]) for point in points]
+    latitudes = [float(point[1]) for point in points]
+
+    if mode == "contains":
+        sql, params = CONTAINS_SQL, [longitudes, latitudes, k]
+    else:
+        sql, params = NEAREST_SQL, [longitudes, latitudes, max_distance, max_distance,
+                                    k * LOOKUP_CANDIDATES_FACTOR, k]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql.format(table=table), params)
+        rows = cursor.fetchall()
+
+    results = [{"point": [longitude, latitude], "buildings": []} for longitude, latitude in zip(longitudes, latitudes)]
+    for ordinality, pk, address, distance in rows:
+        results[ordinality - 1]["buildings"].append({"id": pk, "address": address, "distance": distance})
+    return results
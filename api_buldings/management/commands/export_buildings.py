@@ -0,0 +1,61 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.http import QueryDict
+
+from api_buldings.exporters import EXPORT_CHUNK_SIZE, iter_geojsonl, write_flatgeobuf
+from api_buldings.filters import BuildingFilter
+from api_buldings.models import Building
+
+
+class Command(BaseCommand):
+    help = "Export buildings to GeoJSONL or FlatGeobuf, optionally filtered with the API filter parameters"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="output file, '-' writes GeoJSONL to stdout")
+        parser.add_argument("--format", choices=["geojsonl", "fgb"],
+                            help="output format, guessed from the file extension by default")
+        parser.add_argument("--filter", action="append", default=[], metavar="NAME=VALUE",
+                            help="BuildingFilter parameter, e.g. --filter min_area=100 (may be repeated)")
+        parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE)
+        parser.add_argument("--spatial-index", action="store_true", help="write a FlatGeobuf spatial index")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        output_format = options["format"] or ("fgb" if path.lower().endswith(".fgb") else "geojsonl")
+        if output_format == "fgb" and path == "-":
+            raise CommandError("FlatGeobuf can not be written to stdout")
+
+        queryset = self.get_queryset(options["filter"])
+        started = time.monotonic()
+
+        if output_format == "fgb":
+            count = write_flatgeobuf(queryset, path, spatial_index=options["spatial_index"],
+                                     chunk_size=options["chunk_size"])
+        else:
+            count = 0
+            output = sys.stdout if path == "-" else open(path, "w", encoding="utf-8")
+            try:
+                for line in iter_geojsonl(queryset, chunk_size=options["chunk_size"]):
+                    output.write(line)
+                    count += 1
+            finally:
+                if output is not sys.stdout:
+                    output.close()
+
+        report = self.stderr if path == "-" else self.stdout
+        report.write(f"Exported {count} buildings in {time.monotonic() - started:.1f}s")
+
+    def get_queryset(self, filters):
+        data = QueryDict(mutable=True)
+        for item in filters:
+            name, separator, value = item.partition("=")
+            if not separator:
+                raise CommandError(f"Filter must look like NAME=VALUE: {item}")
+            data.appendlist(name, value)
+
+        filterset = BuildingFilter(data=data, queryset=Building.objects.order_by("pk"))
+        if not filterset.is_valid():
+            raise CommandError(f"Invalid filter: {filterset.errors.as_json()}")
+        return filterset.qs
@@ -0,0 +1,212 @@
+import csv
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from rest_framework.exceptions import ValidationError
+
+from api_buldings.cache import response_cache
+from api_buldings.models import Building, BuildingChange
+from api_buldings.tiles import invalidate_tiles
+from api_buldings.validators import validate_polygons
+
+FORMATS = {
+    ".geojson": "geojson",
+    ".json": "geojson",
+    ".geojsonl": "geojsonl",
+    ".geojsons": "geojsonl",
+    ".jsonl": "geojsonl",
+    ".ndjson": "geojsonl",
+    ".csv": "csv",
+}
+ADDRESS_MAX_LENGTH = Building._meta.get_field("address").max_length
+STAGING_TABLE = "api_buldings_building_import"
+
+
+def parse_record(record, geometry_field):
+    if isinstance(record, str):
+        record = json.loads(record)
+    if not isinstance(record, dict):
+        raise ValidationError(["wrong format"])
+
+    if record.get("type") == "Feature":
+        properties = record.get("properties") or {}
+        address = properties.get("address")
+        geometry = json.dumps(record.get("geometry"))
+    else:
+        address = record.get("address")
+        geometry = record.get(geometry_field)
+
+    if not isinstance(address, str) or not address.strip():
+        raise ValidationError(["address is required"])
+    if len(address) > ADDRESS_MAX_LENGTH:
+        raise ValidationError([f"address is longer than {ADDRESS_MAX_LENGTH} characters"])
+    return address, geometry
+
+
+def prepare_records(items):
+    results = [None] * len(items)
+    parsed = []
+    for index, (record, geometry_field) in enumerate(items):
+        try:
+            parsed.append((index, *parse_record(record, geometry_field)))
+        except ValidationError as e:
+            results[index] = None, "; ".join(str(error) for error in e.detail)
+        except (AttributeError, TypeError, ValueError) as e:
+            results[index] = None, str(e)
+
+    polygons = validate_polygons([geometry for _, _, geometry in parsed])
+    for (index, address, _), (polygon, errors) in zip(parsed, polygons):
+        if errors is not None:
+            results[index] = None, "; ".join(str(error) for error in errors)
+            continue
+        polygon.srid = 4326
+        results[index] = (address, polygon.hexewkb.decode()), None
+    return results
+
+
+class Command(BaseCommand):
+    help = "Import buildings from GeoJSON, GeoJSONL or WKT-CSV into the Building table using COPY"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="input file, '-' reads from stdin")
+        parser.add_argument("--format", choices=sorted(set(FORMATS.values())),
+                            help="input format, guessed from the file extension by default")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                            help="validation processes, 0 validates in the current process")
+        parser.add_argument("--rejected", help="write rejected records with the reason to this JSONL file")
+        parser.add_argument("--geometry-field", default="wkt", help="CSV column holding WKT geometry")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        input_format = options["format"] or FORMATS.get(os.path.splitext(path)[1].lower())
+        if input_format is None:
+            raise CommandError("Can not guess the input format, use --format")
+        if options["batch_size"] <= 0:
+            raise CommandError("--batch-size must be positive")
+
+        self.imported = 0
+        self.rejected = 0
+        self.extents = []
+        self.started = time.monotonic()
+
+        source = sys.stdin if path == "-" else open(path, encoding="utf-8", newline="")
+        rejected_file = open(options["rejected"], "w", encoding="utf-8") if options["rejected"] else None
+        executor = None
+        try:
+            records = ((record, options["geometry_field"]) for record in self.read_records(source, input_format))
+            batch_map = map
+            chunk_size = options["batch_size"]
+            if options["workers"] > 0:
+                executor = ProcessPoolExecutor(options["workers"], initializer=django.setup)
+                chunk_size = max(1, options["batch_size"] // (options["workers"] * 4))
+                batch_map = executor.map
+
+            # validation of the next batch runs in the pool while the current one is copied
+            pending = None
+            while batch := list(islice(records, options["batch_size"])):
+                chunks = [batch[start:start + chunk_size] for start in range(0, len(batch), chunk_size)]
+                results = chain.from_iterable(batch_map(prepare_records, chunks))
+                if pending is not None:
+                    self.load_batch(*pending, rejected_file)
+                pending = batch, results
+            if pending is not None:
+                self.load_batch(*pending, rejected_file)
+        finally:
+            if self.imported:
+                # reaches only this process with the "local" backend, see BUILDINGS_RESPONSE_CACHE
+                response_cache.invalidate()
+                invalidate_tiles(self.extents)
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+            if source is not sys.stdin:
+                source.close()
+            if rejected_file is not None:
+                rejected_file.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {self.imported} buildings, rejected {self.rejected} "
+            f"in {time.monotonic() - self.started:.1f}s"))
+
+    def read_records(self, source, input_format):
+        if input_format == "geojsonl":
+            for line in source:
+                line = line.strip().lstrip("\x1e")
+                if line:
+                    yield line
+        elif input_format == "csv":
+            yield from csv.DictReader(source)
+        else:
+            yield from self.read_feature_collection(source)
+
+    def read_feature_collection(self, source):
+        try:
+            import ijson
+        except ImportError:
+            ijson = None
+
+        if ijson is not None:
+            yield from ijson.items(source, "features.item", use_float=True)
+            return
+
+        data = json.load(source)
+        if not isinstance(data, dict) or data.get("type") != "FeatureCollection":
+            raise CommandError("GeoJSON input must be a FeatureCollection")
+        yield from data["features"]
+
+    def load_batch(self, batch, results, rejected_file):
+        rows = io.StringIO()
+        writer = csv.writer(rows)
+        count = 0
+        for (record, _), (row, error) in zip(batch, results):
+            if error is not None:
+                self.rejected += 1
+                if rejected_file is not None:
+                    rejected = {"record": self.imported + self.rejected + count, "error": error, "source": record}
+                    rejected_file.write(json.dumps(rejected, ensure_ascii=False) + "\n")
+                continue
+            writer.writerow(row)
+            count += 1
+
+        if count:
+            rows.seek(0)
+            self.copy_rows(rows)
+            self.imported += count
+
+        rate = self.imported / max(time.monotonic() - self.started, 1e-9)
+        self.stdout.write(f"{self.imported} imported, {self.rejected} rejected, {rate:.0f} rows/s")
+
+    def copy_rows(self, rows):
+        # COPY into a staging table and move the rows with INSERT ... RETURNING, so exactly the imported
+        # ids get their change records, and the area is computed on the way instead of by a second UPDATE.
+        meta = Building._meta
+        quote_name = connection.ops.quote_name
+        address, geom, area = (quote_name(meta.get_field(name).column) for name in ("address", "geom", "area"))
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"CREATE TEMPORARY TABLE {STAGING_TABLE} ({address} text, {geom} geography(Polygon, 4326)) "
+                           "ON COMMIT DROP")
+            sql = f"COPY {STAGING_TABLE} ({address}, {geom}) FROM STDIN WITH (FORMAT csv)"
+            if hasattr(cursor, "copy_expert"):
+                cursor.copy_expert(sql, rows)
+            else:
+                with cursor.copy(sql) as copy:
+                    copy.write(rows.getvalue())
+            cursor.execute(
+                f"INSERT INTO {quote_name(meta.db_table)} ({address}, {geom}, {area}) "
+                f"SELECT {address}, {geom}, ST_Area({geom}) FROM {STAGING_TABLE} "
+                f"RETURNING {quote_name(meta.pk.column)}")
+            imported = [pk for (pk,) in cursor.fetchall()]
+            cursor.execute(f"SELECT ST_XMin(extent), ST_YMin(extent), ST_XMax(extent), ST_YMax(extent) "
+                           f"FROM (SELECT ST_Extent({geom}::geometry) AS extent FROM {STAGING_TABLE}) AS batch")
+            self.extents.append(cursor.fetchone())
+            # dropped here too, an outer transaction would keep it past this batch
+            cursor.execute(f"DROP TABLE {STAGING_TABLE}")
+            BuildingChange.objects.record(imported, BuildingChange.Action.CREATED)
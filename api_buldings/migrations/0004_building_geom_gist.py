@@ -0,0 +1,27 @@
+# Generated by Django 5.0.4 on 2026-10-18 10:12
+
+import django.contrib.gis.db.models.fields
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api_buldings", "0003_alter_building_geom"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="building",
+            name="geom",
+            field=django.contrib.gis.db.models.fields.PolygonField(
+                geography=True, spatial_index=False, srid=4326
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="building",
+            index=django.contrib.postgres.indexes.GistIndex(
+                fields=["geom"], name="building_geom_gist"
+            ),
+        ),
+    ]
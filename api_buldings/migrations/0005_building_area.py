@@ -0,0 +1,28 @@
+# Generated by Django 5.0.4 on 2026-10-18 10:47
+
+from django.contrib.gis.db.models.functions import Area
+from django.db import migrations, models
+
+
+def fill_area(apps, schema_editor):
+    Building = apps.get_model("api_buldings", "Building")
+    Building.objects.update(area=Area("geom"))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api_buldings", "0004_building_geom_gist"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="building",
+            name="area",
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.RunPython(fill_area, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="building",
+            index=models.Index(fields=["area"], name="building_area_idx"),
+        ),
+    ]
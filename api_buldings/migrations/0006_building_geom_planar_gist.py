@@ -0,0 +1,24 @@
+# Generated by Django 5.0.4 on 2026-10-18 11:38
+
+import django.contrib.gis.db.models.fields
+import django.contrib.postgres.indexes
+import django.db.models.functions.comparison
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api_buldings", "0005_building_area"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="building",
+            index=django.contrib.postgres.indexes.GistIndex(
+                django.db.models.functions.comparison.Cast(
+                    "geom", django.contrib.gis.db.models.fields.PolygonField(srid=4326)
+                ),
+                name="building_geom_planar_gist",
+            ),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.4 on 2026-10-18 14:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api_buldings", "0006_building_geom_planar_gist"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="building",
+            name="version",
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
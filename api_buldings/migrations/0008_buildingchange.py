@@ -0,0 +1,52 @@
+# Generated by Django 5.0.4 on 2026-10-18 14:40
+
+from django.db import migrations, models
+
+
+def record_existing(apps, schema_editor):
+    Building = apps.get_model("api_buldings", "Building")
+    BuildingChange = apps.get_model("api_buldings", "BuildingChange")
+    BuildingChange.objects.bulk_create(
+        (
+            BuildingChange(building_id=pk, action="created")
+            for pk in Building.objects.order_by("pk").values_list("pk", flat=True).iterator()
+        ),
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api_buldings", "0007_building_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BuildingChange",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("building_id", models.BigIntegerField(db_index=True)),
+                (
+                    "action",
+                    models.CharField(
+                        choices=[
+                            ("created", "Created"),
+                            ("updated", "Updated"),
+                            ("deleted", "Deleted"),
+                        ],
+                        max_length=7,
+                    ),
+                ),
+                ("changed_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.RunPython(record_existing, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.4 on 2026-10-18 08:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api_buldings", "0008_buildingchange"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="building",
+            name="version",
+            field=models.PositiveIntegerField(db_default=1, default=1, editable=False),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.4 on 2026-10-18 09:20
+
+from django.db import migrations
+
+BUMP_VERSION_SQL = """
+CREATE FUNCTION api_buldings_building_bump_version() RETURNS trigger AS $$
+BEGIN
+    IF NEW.address IS DISTINCT FROM OLD.address OR NEW.geom::bytea IS DISTINCT FROM OLD.geom::bytea THEN
+        NEW.version := OLD.version + 1;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER api_buldings_building_bump_version
+    BEFORE UPDATE ON api_buldings_building
+    FOR EACH ROW EXECUTE FUNCTION api_buldings_building_bump_version();
+"""
+
+DROP_BUMP_VERSION_SQL = """
+DROP TRIGGER api_buldings_building_bump_version ON api_buldings_building;
+DROP FUNCTION api_buldings_building_bump_version();
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api_buldings", "0009_alter_building_version"),
+    ]
+
+    operations = [
+        migrations.RunSQL(BUMP_VERSION_SQL, DROP_BUMP_VERSION_SQL),
+    ]
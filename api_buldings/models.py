@@ -1,12 +1,81 @@
 from django.contrib.gis.db import models
+from django.contrib.gis.db.models.functions import Area, GeomOutputGeoFunc
+from django.contrib.postgres.indexes import GistIndex
+from django.db import connections, router, transaction
+from django.db.models import Value
+from django.db.models.functions import Cast
+
+METERS_PER_DEGREE = 111320
+# pg_advisory_xact_lock key taken by writers of BuildingChange
+CHANGES_LOCK_ID = 0x6275696C64
+
+
+def planar_geom(expression="geom"):
+    return Cast(expression, models.PolygonField(srid=4326))
+
+
+class SimplifyPreserveTopology(GeomOutputGeoFunc):
+    arity = 2
+
+    def __init__(self, expression, tolerance, **extra):
+        super().__init__(expression, Value(float(tolerance)), **extra)
+
+
+def simplified_geom(meters, expression="geom"):
+    return SimplifyPreserveTopology(planar_geom(expression), meters / METERS_PER_DEGREE)
+
+
+class BuildingQuerySet(models.QuerySet):
+    def update_area(self, **fields):
+        return self.update(area=Area('geom'), **fields)
 
 
 # Create your models here.
 class Building(models.Model):
-    objects = models.Manager()
+    objects = BuildingQuerySet.as_manager()
 
     address = models.CharField(max_length=255)
-    geom = models.PolygonField(srid=4326, geography=True)
+    geom = models.PolygonField(srid=4326, geography=True, spatial_index=False)
+    area = models.FloatField(null=True, editable=False)
+    # bumped by a trigger whenever address or geom change (migration 0010)
+    version = models.PositiveIntegerField(default=1, db_default=1, editable=False)
+
+    class Meta:
+        indexes = [
+            GistIndex(fields=["geom"], name="building_geom_gist"),
+            GistIndex(planar_geom(), name="building_geom_planar_gist"),
+            models.Index(fields=["area"], name="building_area_idx"),
+        ]
 
     def __str__(self):
         return f"Buildings: pk={self.pk} address={self.address}"
+
+
+class BuildingChangeQuerySet(models.QuerySet):
+    def record(self, building_ids, action):
+        changes = [self.model(building_id=pk, action=action) for pk in building_ids]
+        if not changes:
+            return changes
+        # Change ids are the feed cursor, so they have to become visible in id order. Writers take turns
+        # from taking their ids to their commit, a reader can't move past an id that commits later.
+        db = router.db_for_write(self.model)
+        with transaction.atomic(using=db):
+            with connections[db].cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_xact_lock(%s)", [CHANGES_LOCK_ID])
+            return self.using(db).bulk_create(changes)
+
+
+class BuildingChange(models.Model):
+    class Action(models.TextChoices):
+        CREATED = "created"
+        UPDATED = "updated"
+        DELETED = "deleted"
+
+    objects = BuildingChangeQuerySet.as_manager()
+
+    building_id = models.BigIntegerField(db_index=True)
+    action = models.CharField(max_length=7, choices=Action.choices)
+    changed_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"BuildingChange: pk={self.pk} building_id={self.building_id} action={self.action}"
@@ -0,0 +1,81 @@
+from base64 import b64decode, b64encode
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class BuildingKeysetPagination(BasePagination):
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    ordering_query_param = "ordering"
+    nearest_query_param = "nearest"
+    max_page_size = 10000
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if self.page_size is None:
+            return None
+
+        self.request = request
+        # nearest picks the k closest buildings, its pages keep the distance order whatever ordering says
+        self.order_by_distance = ("distance" in queryset.query.annotations
+                                  and (request.query_params.get(self.ordering_query_param) == "distance"
+                                       or self.nearest_query_param in request.query_params))
+        cursor = self.decode_cursor(request)
+
+        if self.order_by_distance:
+            queryset = queryset.order_by("distance", "pk")
+            if cursor is not None:
+                distance, pk = cursor
+                queryset = queryset.filter(Q(distance__gt=distance) | Q(distance=distance, pk__gt=pk))
+        else:
+            queryset = queryset.order_by("pk")
+            if cursor is not None:
+                queryset = queryset.filter(pk__gt=cursor[-1])
+
+        page = list(queryset[:self.page_size + 1])
+        self.next_cursor = None
+        if len(page) > self.page_size:
+            page = page[:self.page_size]
+            last = page[-1]
+            self.next_cursor = (last.distance.m, last.pk) if self.order_by_distance else (last.pk,)
+        return page
+
+    def get_paginated_response(self, data):
+        data["next"] = self.get_next_link()
+        return Response(data)
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return None
+        if page_size <= 0:
+            return None
+        return min(page_size, self.max_page_size)
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_cursor))
+
+    def encode_cursor(self, cursor):
+        return b64encode(",".join(repr(value) for value in cursor).encode(), altchars=b"-_").decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            values = b64decode(encoded.encode(), altchars=b"-_", validate=True).decode().split(",")
+            if self.order_by_distance:
+                distance, pk = values
+                return float(distance), int(pk)
+            return (int(values[-1]),)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
@@ -0,0 +1,29 @@
+import codecs
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class NDJSONParser(BaseParser):
+    media_type = "application/x-ndjson"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+
+        features = []
+        for number, line in enumerate(codecs.getreader(encoding)(stream), 1):
+            line = line.strip().lstrip("\x1e")
+            if not line:
+                continue
+            try:
+                features.append(json.loads(line))
+            except ValueError as exc:
+                raise ParseError(f"NDJSON parse error on line {number} - {exc}")
+        return features
+
+
+class GeoJSONSeqParser(NDJSONParser):
+    media_type = "application/geo+json-seq"
@@ -0,0 +1,128 @@
+import json
+from importlib.util import find_spec
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from api_buldings.instrumentation import timed
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None and not hasattr(orjson, "Fragment"):
+    # raw fragments need orjson>=3.9
+    orjson = None
+
+DEFAULT_ENCODER = JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+
+class RawJSON:
+    __slots__ = ("value",)
+
+    def __init__(self, value: str):
+        self.value = value
+
+
+def dumps(data, encoder=DEFAULT_ENCODER):
+    if isinstance(data, RawJSON):
+        return data.value
+    if isinstance(data, dict):
+        items = (encoder.encode(str(key)) + encoder.key_separator + dumps(value, encoder)
+                 for key, value in data.items())
+        return "{" + encoder.item_separator.join(items) + "}"
+    if isinstance(data, (list, tuple)):
+        return "[" + encoder.item_separator.join(dumps(item, encoder) for item in data) + "]"
+    return encoder.encode(data)
+
+
+def load_raw(data):
+    if isinstance(data, RawJSON):
+        return json.loads(data.value)
+    if isinstance(data, dict):
+        return {key: load_raw(value) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [load_raw(item) for item in data]
+    return data
+
+
+class GeoJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        with timed("render"):
+            return self.render_data(data, accepted_media_type, renderer_context or {})
+
+    def render_data(self, data, accepted_media_type, renderer_context):
+        if self.get_indent(accepted_media_type, renderer_context) is not None:
+            return super().render(load_raw(data), accepted_media_type, renderer_context)
+
+        encoder = self.encoder_class(ensure_ascii=self.ensure_ascii, allow_nan=not self.strict,
+                                     separators=(",", ":") if self.compact else (", ", ": "))
+        ret = dumps(data, encoder)
+        ret = ret.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
+        return ret.encode()
+
+
+class ORJSONRenderer(GeoJSONRenderer):
+    options = orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+
+    def render_data(self, data, accepted_media_type, renderer_context):
+        if (orjson is None or not self.compact or self.ensure_ascii
+                or self.get_indent(accepted_media_type, renderer_context) is not None):
+            return super().render_data(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=self.default, option=self.options)
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
+
+    def default(self, obj):
+        if isinstance(obj, RawJSON):
+            return orjson.Fragment(obj.value)
+        return self.encoder_class().default(obj)
+
+
+class BinaryRenderer(BaseRenderer):
+    charset = None
+    requires = None
+
+    @classmethod
+    def available(cls):
+        return cls.requires is None or find_spec(cls.requires) is not None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if isinstance(data, bytes):
+            return data
+        with timed("render"):
+            return dumps(data).encode()
+
+
+class GeoJSONLRenderer(BinaryRenderer):
+    media_type = "application/x-ndjson"
+    format = "geojsonl"
+
+
+class FlatGeobufRenderer(BinaryRenderer):
+    media_type = "application/flatgeobuf"
+    format = "fgb"
+
+
+class GeoArrowRenderer(BinaryRenderer):
+    media_type = "application/vnd.apache.arrow.stream"
+    format = "arrow"
+    requires = "pyarrow"
+
+
+class GeoParquetRenderer(BinaryRenderer):
+    media_type = "application/vnd.apache.parquet"
+    format = "parquet"
+    requires = "pyarrow"
+
+
+class MVTRenderer(BinaryRenderer):
+    media_type = "application/vnd.mapbox-vector-tile"
+    format = "mvt"
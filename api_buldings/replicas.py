@@ -0,0 +1,76 @@
+import random
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+REPLICA_ACTIONS = ("list", "retrieve")
+STICKY_COOKIE = "buildings_primary"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def get_replicas():
+    return getattr(settings, "BUILDINGS_READ_REPLICAS", [])
+
+
+def is_read_only(request):
+    # POST endpoints that don't write (e.g. lookup) set read_only = True on the view, or @action(read_only=True)
+    match = request.resolver_match
+    if match is None:
+        return False
+    return getattr(match.func, "read_only", False) or getattr(match.func, "initkwargs", {}).get("read_only", False)
+
+
+def get_read_database(request):
+    # Clients that wrote recently read from the primary until the replicas have caught up.
+    replicas = get_replicas()
+    if not replicas or STICKY_COOKIE in request.COOKIES:
+        return DEFAULT_DB_ALIAS
+    return random.choice(replicas)
+
+
+class PrimaryReplicaRouter:
+    # Replica reads are chosen per request with .using(), everything else goes to the primary,
+    # including saves of instances that were loaded from a replica.
+
+    def db_for_read(self, model, **hints):
+        return None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in get_replicas():
+            return False
+        return None
+
+
+class ReplicaStickinessMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.stick(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.stick(request, await self.get_response(request))
+
+    def stick(self, request, response):
+        if (get_replicas() and request.method not in SAFE_METHODS and response.status_code < 400
+                and not is_read_only(request)):
+            response.set_cookie(STICKY_COOKIE, "1", max_age=settings.BUILDINGS_REPLICA_STICKY_SECONDS,
+                                httponly=True, samesite="Lax")
+        return response
@@ -1,12 +1,24 @@
 import json
+from math import ceil, log10
 
-from django.contrib.gis.db.models.functions import Distance, Area
-from django.contrib.gis.geos import GEOSGeometry, Polygon
+from django.contrib.gis.db.models.functions import AsGeoJSON, Distance
 from django.db.models import QuerySet
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
+from rest_framework.fields import SkipField
 
-from api_buldings.models import Building
+from api_buldings.changes import CHANGES_MAX_PAGE_SIZE, CHANGES_PAGE_SIZE
+from api_buldings.instrumentation import record_rows
+from api_buldings.lookup import LOOKUP_MAX_NEIGHBOURS, LOOKUP_MAX_POINTS
+from api_buldings.models import Building, simplified_geom
+from api_buldings.renderers import RawJSON, dumps
+from api_buldings.tiles import TILE_MAX_ZOOM
+from api_buldings.validators import validate_polygon
+
+STREAM_CHUNK_SIZE = 2000
+GEOJSON_PRECISION = 17
+MAX_SIMPLIFY_TOLERANCE = 10000
+SPARSE_FIELDS = ("id", "address", "area", "distance", "geometry")
 
 
 class BuildingSerializer(serializers.ModelSerializer):
@@ -32,28 +44,26 @@ class BuildingSerializer(serializers.ModelSerializer):
         return internal_value
 
     def validate_geom(self, value):
-        try:
-            polygon = GEOSGeometry(value)
-        except Exception as e:
-            raise ValidationError([str(e)])
+        return validate_polygon(value)
 
-        if not isinstance(polygon, Polygon):
-            raise ValidationError(["geom must be a Polygon"])
+    def create(self, validated_data):
+        instance = super().create(validated_data)
+        return self.save_area(instance)
 
-        if not polygon.valid:
-            raise ValidationError([f"geom is not a valid polygon: {polygon.valid_reason}"])
+    def update(self, instance, validated_data):
+        instance = super().update(instance, validated_data)
+        return self.save_area(instance)
 
-        for coord in polygon.coords[0]:
-            if not (-180.0 <= coord[0] <= 180.0 and -90.0 <= coord[1] <= 90.0):
-                raise ValidationError([
-                    "Coordinates out of range: longitude must be between -180 and 180, latitude must be between -90 and 90"])
-        return polygon
+    def save_area(self, instance, **fields):
+        queryset = Building.objects.filter(pk=instance.pk)
+        queryset.update_area(**fields)
+        instance.area, instance.version = queryset.values_list("area", "version").get()
+        return instance
 
     def get_area(self, obj):
-        area = getattr(obj, 'area', None)
-        if area is None:
+        if "area" not in self.context:
             return None
-        return area.sq_m
+        return obj.area
 
     def get_distance(self, obj):
         distance = getattr(obj, 'distance', None)
@@ -74,8 +84,16 @@ class BuildingSerializer(serializers.ModelSerializer):
 
     def change_queryset_serializers_context(self, queryset):
         context = self.context
-        if "area" in context:
-            queryset = queryset.annotate(area=Area('geom'))
+        geometry = 'geom'
+        if context.get("simplify"):
+            geometry = simplified_geom(context["simplify"])
+        precision = context.get("precision", GEOJSON_PRECISION)
+        if context.get("geometry", True):
+            queryset = queryset.annotate(geojson=AsGeoJSON(geometry, precision=precision))
+        queryset = queryset.defer('geom')
+        if "fields" in context:
+            queryset = queryset.only("pk", "version",
+                                     *(name for name in ("address", "area") if name in context["fields"]))
 
         if "target_point" in context:
             ref_point = context.get("target_point")
@@ -83,32 +101,122 @@ class BuildingSerializer(serializers.ModelSerializer):
         return queryset
 
     def to_representation(self, queryset: QuerySet):
-        if not isinstance(queryset, QuerySet) and self.single:
-            return self.to_representation_single(queryset)
+        if not isinstance(queryset, QuerySet):
+            if self.single:
+                return self.to_representation_single(queryset)
+            instances = queryset
+        else:
+            instances = self.change_queryset_serializers_context(queryset)
 
-        instances = self.change_queryset_serializers_context(queryset)
         if not self.single:
             feature_collection = {
                 "type": "FeatureCollection",
                 "features": [self.to_representation_single(obj) for obj in instances]
             }
+            record_rows(len(feature_collection["features"]))
             return feature_collection
         else:
             instance = instances[0]
             return self.to_representation_single(instance)
 
-    def to_representation_single(self, instance):
-        serialize_data = super().to_representation(instance)
-
+    def to_representation_stream(self, queryset: QuerySet, chunk_size=STREAM_CHUNK_SIZE):
+        instances = self.change_queryset_serializers_context(queryset)
+        yield '{"type":"FeatureCollection","features":['
+        separator = ""
+        for instance in instances.iterator(chunk_size=chunk_size):
+            yield separator + dumps(self.to_representation_single(instance))
+            separator = ","
+        yield "]}"
+
+    async def ato_representation_stream(self, queryset: QuerySet, chunk_size=STREAM_CHUNK_SIZE):
+        instances = self.change_queryset_serializers_context(queryset)
+        yield '{"type":"FeatureCollection","features":['
+        separator = ""
+        async for instance in instances.aiterator(chunk_size=chunk_size):
+            yield separator + dumps(self.to_representation_single(instance))
+            separator = ","
+        yield "]}"
+
+    def to_representation_properties(self, instance):
         proprieties = {}
-        for atr in serialize_data:
-            if atr not in ["id", "geom"] and serialize_data[atr] is not None:
-                proprieties[atr] = serialize_data[atr]
+        fields = self.context.get("fields")
+        for field in self._readable_fields:
+            if field.field_name in ["id", "geom"]:
+                continue
+            if fields is not None and field.field_name not in fields:
+                continue
+            try:
+                attribute = field.get_attribute(instance)
+            except SkipField:
+                continue
+            if attribute is not None:
+                value = field.to_representation(attribute)
+                if value is not None:
+                    proprieties[field.field_name] = value
+        return proprieties
+
+    def to_representation_single(self, instance):
+        geojson = getattr(instance, "geojson", None)
+        if not self.context.get("geometry", True):
+            geometry = None
+        elif geojson is not None:
+            geometry = RawJSON(geojson)
+        else:
+            geometry = json.loads(instance.geom.json)
 
         result = {
             "type": "Feature",
-            "geometry": json.loads(instance.geom.json),
+            "geometry": geometry,
             "id": instance.pk,
-            "properties": proprieties
+            "properties": self.to_representation_properties(instance)
         }
         return result
+
+
+class GeometryOptionsSerializer(serializers.Serializer):
+    simplify = serializers.FloatField(required=False, min_value=0, max_value=MAX_SIMPLIFY_TOLERANCE)
+    precision = serializers.IntegerField(required=False, min_value=0, max_value=GEOJSON_PRECISION)
+    zoom = serializers.IntegerField(required=False, min_value=0, max_value=TILE_MAX_ZOOM)
+    fields = serializers.CharField(required=False)
+    geometry = serializers.BooleanField(default=True)
+
+    def validate_fields(self, value):
+        fields = {name.strip() for name in value.split(",") if name.strip()}
+        unknown = fields - set(SPARSE_FIELDS)
+        if unknown:
+            raise ValidationError(f"Unknown fields: {', '.join(sorted(unknown))}, allowed: {', '.join(SPARSE_FIELDS)}")
+        return fields
+
+    def validate(self, attrs):
+        if "fields" in attrs:
+            attrs["geometry"] = attrs["geometry"] and "geometry" in attrs["fields"]
+            if "area" in attrs["fields"]:
+                attrs["area"] = True
+        zoom = attrs.pop("zoom", None)
+        if zoom is not None:
+            # One screen pixel of a 256px web mercator tile at the equator.
+            attrs.setdefault("simplify", 156543.03392 / 2 ** zoom)
+            attrs.setdefault("precision", max(0, ceil(log10(256 * 2 ** zoom / 360))))
+        return attrs
+
+
+class PointLookupSerializer(serializers.Serializer):
+    points = serializers.ListField(allow_empty=False, max_length=LOOKUP_MAX_POINTS)
+    mode = serializers.ChoiceField(choices=["nearest", "contains"], default="nearest")
+    k = serializers.IntegerField(default=1, min_value=1, max_value=LOOKUP_MAX_NEIGHBOURS)
+    max_distance = serializers.FloatField(required=False, min_value=0)
+
+    def validate_points(self, value):
+        for point in value:
+            if not (isinstance(point, (list, tuple)) and len(point) == 2
+                    and all(isinstance(coord, (int, float)) and not isinstance(coord, bool) for coord in point)):
+                raise ValidationError("Each point must be a [longitude, latitude] pair of numbers")
+            if not (-180.0 <= point[0] <= 180.0 and -90.0 <= point[1] <= 90.0):
+                raise ValidationError(
+                    "Coordinates out of range: longitude must be between -180 and 180, latitude must be between -90 and 90")
+        return value
+
+
+class ChangesQuerySerializer(serializers.Serializer):
+    since = serializers.IntegerField(default=0, min_value=0)
+    limit = serializers.IntegerField(default=CHANGES_PAGE_SIZE, min_value=1, max_value=CHANGES_MAX_PAGE_SIZE)
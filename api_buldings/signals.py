@@ -0,0 +1,13 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from api_buldings.cache import response_cache
+from api_buldings.models import Building
+
+
+@receiver([post_save, post_delete], sender=Building)
+def invalidate_response_cache(sender, **kwargs):
+    # Until the commit other requests still read the old rows, a bump before it would let them
+    # cache those under the new generation.
+    transaction.on_commit(response_cache.invalidate)
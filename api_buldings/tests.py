@@ -1,9 +1,31 @@
-from math import inf
+import csv
+import json
+import os
+import tempfile
+from importlib.util import find_spec
+from io import BytesIO, StringIO
+from math import asinh, cos, floor, inf, pi, radians, sin, tan
+from unittest import skipUnless
+from unittest.mock import patch
 
-from django.contrib.gis.geos import Polygon
-from django.test import TestCase
+from django.contrib.gis.db.models.functions import Area, Distance
+from django.contrib.gis.geos import GEOSGeometry, Point, Polygon
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Max
+from django.http import HttpResponse, QueryDict
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import resolve
+from rest_framework.request import Request
+from rest_framework.response import Response
 
-from api_buldings.models import Building
+from api_buldings.cache import ChangesGenerationBackend, normalize_params, response_cache
+from api_buldings.models import Building, BuildingChange
+from api_buldings.renderers import GeoArrowRenderer, GeoJSONRenderer, ORJSONRenderer, RawJSON
+from api_buldings.replicas import STICKY_COOKIE, PrimaryReplicaRouter, ReplicaStickinessMiddleware
+from api_buldings.tiles import tile_cache
+from api_buldings.validators import validate_polygons
+from api_buldings.views import BuildingViewSet
 
 # Create your tests here.
 TEST_GEOM = "POLYGON ((19.298488064150035 43.510902041818866, 19.528309386031935 43.24686866222709, 20.179459092915266 42.82572783537185, 19.298488064150035 43.510902041818866))"
@@ -18,7 +40,14 @@ TEST_POINT1 = (39.67012990906166436, 47.21085518012574767)
 TEST_POINT2 = (39.67416330589383477, 47.21440557674531391)
 
 
-class BuildingsCRUDTestsCollection(TestCase):
+class BuildingsTestCase(TestCase):
+    # The response and tile caches live in the process and survive the per-test rollback.
+    def setUp(self):
+        response_cache.invalidate()
+        tile_cache.clear()
+
+
+class BuildingsCRUDTestsCollection(BuildingsTestCase):
     fixtures = ["buildings"]
 
     def test_create_wkt(self):
@@ -62,6 +91,111 @@ class BuildingsCRUDTestsCollection(TestCase):
         response = self.client.post(url, data=geo_json, content_type="application/json")
         self.assertEqual(response.status_code, 400)
 
+    def test_create_invalid_geometries(self):
+        url = "/api/buildings/"
+        too_many_vertices = Polygon([(cos(2 * pi * i / 100000), sin(2 * pi * i / 100000)) for i in range(100000)]
+                                    + [(1, 0)])
+        geometries = [
+            "POLYGON ((0 0, 1 0, 2 0, 0 0))",
+            "POLYGON ((0 0, 1 0, 1 1, 0 0), (0.5 0.1, 200 0.1, 0.9 0.5, 0.5 0.1))",
+            "LINESTRING (0 0, 1 1)",
+            too_many_vertices.wkt,
+        ]
+        for geom in geometries:
+            response = self.client.post(url, data={"address": "test", "geom": geom}, content_type="application/json")
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("geom", response.json())
+
+    def test_validate_polygons_batch(self):
+        results = validate_polygons([TEST_GEOM, "POLYGON ((0 0, 0 0, 0 0, 0 0))", "not a geometry", TEST_GEOM])
+        self.assertEqual([polygon is not None for polygon, _ in results], [True, False, False, True])
+        self.assertEqual(results[1][1], ["ring 0 is degenerate"])
+        self.assertEqual(results[3][0].coords[0], TEST_POLYGON)
+
+    def test_bulk_create_and_upsert(self):
+        url = "/api/buildings/bulk/"
+
+        feature = {
+            "type": "Feature",
+            "geometry": {
+                "type": "Polygon",
+                "coordinates": [TEST_POLYGON]
+            },
+            "properties": {"address": "bulk"}
+        }
+        not_closed_feature = {
+            "type": "Feature",
+            "geometry": {
+                "type": "Polygon",
+                "coordinates": [NOT_CLOSED_POLYGON]
+            },
+            "properties": {"address": "bulk"}
+        }
+        feature_collection = {
+            "type": "FeatureCollection",
+            "features": [feature, not_closed_feature, dict(feature, id=14), dict(feature, id=100)]
+        }
+        count = Building.objects.count()
+
+        response = self.client.post(url, data=feature_collection, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+
+        data = response.json()
+        self.assertEqual(len(data["created"]), 2)
+        self.assertIn(100, data["created"])
+        self.assertEqual(data["updated"], [14])
+        self.assertEqual([error["index"] for error in data["errors"]], [1])
+
+        self.assertEqual(Building.objects.count(), count + 2)
+        self.assertEqual(Building.objects.get(pk=14).address, "bulk")
+        self.assertEqual(Building.objects.get(pk=14).version, 2)
+        self.assertEqual(Building.objects.get(pk=100).version, 1)
+        self.assertIsNotNone(Building.objects.get(pk=100).area)
+
+        response = self.client.post("/api/buildings/", data={"address": "test", "geom": TEST_GEOM})
+        self.assertEqual(response.status_code, 201)
+        self.assertGreater(response.json()["id"], 100)
+
+    def test_bulk_generated_id_after_explicit_id(self):
+        feature = {"type": "Feature", "geometry": json.loads(GEOSGeometry(TEST_GEOM).json),
+                   "properties": {"address": "generated"}}
+        next_id = Building.objects.order_by("-pk").first().pk + 1
+
+        response = self.client.post("/api/buildings/bulk/", content_type="application/json",
+                                    data=[dict(feature, id=next_id, properties={"address": "explicit"}), feature])
+        self.assertEqual(response.status_code, 200)
+
+        created = response.json()["created"]
+        self.assertEqual(len(set(created)), 2)
+        self.assertEqual(created[0], next_id)
+        self.assertEqual(Building.objects.get(pk=next_id).address, "explicit")
+        self.assertEqual(Building.objects.get(pk=created[1]).address, "generated")
+
+    def test_bulk_create_ndjson(self):
+        url = "/api/buildings/bulk/"
+
+        feature = {
+            "type": "Feature",
+            "geometry": {
+                "type": "Polygon",
+                "coordinates": [TEST_POLYGON]
+            },
+            "properties": {"address": "bulk"}
+        }
+        data = "\n".join(json.dumps(feature) for _ in range(3))
+        count = Building.objects.count()
+
+        response = self.client.post(url, data=data, content_type="application/x-ndjson")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["created"]), 3)
+        self.assertEqual(Building.objects.count(), count + 3)
+
+    def test_bulk_create_wrong_format(self):
+        url = "/api/buildings/bulk/"
+
+        response = self.client.post(url, data={"type": "Feature"}, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+
     def test_delete_buildings(self):
         url = "/api/buildings/13/"
         response = self.client.delete(url)
@@ -106,6 +240,54 @@ class BuildingsCRUDTestsCollection(TestCase):
         count_response = len(response.json()["features"])
         self.assertEqual(count, count_response)
 
+    def test_get_buildings_stream(self):
+        url = "/api/buildings/?stream"
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+
+        data = json.loads(b"".join(response.streaming_content))
+        self.assertEqual(data["type"], "FeatureCollection")
+
+        features = sorted(data["features"], key=lambda feature: feature["id"])
+        expected = sorted(self.client.get("/api/buildings/").json()["features"], key=lambda feature: feature["id"])
+        self.assertEqual(features, expected)
+
+    def test_get_buildings_keyset_pagination(self):
+        url = "/api/buildings/?page_size=2"
+        ids = []
+
+        while url is not None:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            self.assertEqual(data["type"], "FeatureCollection")
+            self.assertLessEqual(len(data["features"]), 2)
+            ids += [feature["id"] for feature in data["features"]]
+            url = data["next"]
+
+        self.assertEqual(ids, sorted(Building.objects.values_list("pk", flat=True)))
+
+    def test_get_buildings_keyset_pagination_by_distance(self):
+        longitude, latitude = TEST_POINT1
+        url = f"/api/buildings/?page_size=2&ordering=distance&{longitude=}&{latitude=}"
+        distances = []
+
+        while url is not None:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            distances += [feature["properties"]["distance"] for feature in data["features"]]
+            url = data["next"]
+
+        self.assertEqual(len(distances), Building.objects.count())
+        self.assertEqual(distances, sorted(distances))
+
+    def test_get_buildings_keyset_pagination_invalid_cursor(self):
+        response = self.client.get("/api/buildings/?page_size=2&cursor=wrong")
+        self.assertEqual(response.status_code, 404)
+
     def test_get_target_building_and_format_feature(self):
         url = "/api/buildings/14/"
 
@@ -121,6 +303,130 @@ class BuildingsCRUDTestsCollection(TestCase):
         self.assertEqual(data["geometry"].get("type").lower(), "polygon")
         self.assertIsInstance(data.get("properties"), dict)
 
+    def test_get_target_building_geometry_from_database(self):
+        url = "/api/buildings/14/"
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        building = Building.objects.get(pk=14)
+        self.assertEqual(response.json()["geometry"], json.loads(building.geom.json))
+        self.assertEqual(response.json()["id"], building.pk)
+
+    def test_get_target_building_simplified(self):
+        url = "/api/buildings/12/"
+
+        full = self.client.get(url).json()["geometry"]["coordinates"][0]
+        response = self.client.get(url + "?simplify=50")
+        self.assertEqual(response.status_code, 200)
+        simplified = response.json()["geometry"]["coordinates"][0]
+        self.assertEqual(response.json()["geometry"]["type"], "Polygon")
+        self.assertLess(len(simplified), len(full))
+        self.assertGreaterEqual(len(simplified), 4)
+
+    def test_get_buildings_precision(self):
+        response = self.client.get("/api/buildings/?precision=3")
+        self.assertEqual(response.status_code, 200)
+        for feature in response.json()["features"]:
+            for longitude, latitude in feature["geometry"]["coordinates"][0]:
+                self.assertEqual(round(longitude, 3), longitude)
+                self.assertEqual(round(latitude, 3), latitude)
+
+        response = self.client.get("/api/buildings/?zoom=10")
+        self.assertEqual(response.status_code, 200)
+
+    def test_get_buildings_wrong_geometry_options(self):
+        for query in ("simplify=-1", "simplify=abc", "precision=18", "zoom=30"):
+            response = self.client.get(f"/api/buildings/?{query}")
+            self.assertEqual(response.status_code, 400)
+
+    def test_get_target_building_single_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/buildings/14/")
+        self.assertEqual(response.status_code, 200)
+
+    def test_get_target_building_etag(self):
+        url = "/api/buildings/14/"
+
+        response = self.client.get(url)
+        etag = response["ETag"]
+        self.assertTrue(etag.startswith('"'))
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["ETag"], etag)
+
+        response_cache.invalidate()
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=f'"other", W/{etag}')
+        self.assertEqual(response.status_code, 304)
+
+        self.assertNotEqual(self.client.get(url + "?area")["ETag"], etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(url, data={"address": "new address", "geom": TEST_GEOM},
+                                       content_type="application/json")
+        self.assertEqual(Building.objects.get(pk=14).version, 2)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_version_bumped_on_any_write(self):
+        Building.objects.filter(pk=14).update(address="new address")
+        self.assertEqual(Building.objects.get(pk=14).version, 2)
+
+        building = Building.objects.get(pk=14)
+        building.save()
+        Building.objects.filter(pk=14).update_area()
+        self.assertEqual(Building.objects.get(pk=14).version, 2)
+
+        building.geom = GEOSGeometry(TEST_GEOM, srid=4326)
+        building.save()
+        self.assertEqual(Building.objects.get(pk=14).version, 3)
+
+    def test_orjson_renderer_output(self):
+        geometry = json.loads(Building.objects.get(pk=14).geom.json)
+        data = {"type": "FeatureCollection",
+                "features": [{"type": "Feature", "geometry": RawJSON(json.dumps(geometry, separators=(",", ":"))),
+                              "id": 14, "properties": {"address": "ул. Пушкина \u2028", "area": 868.2489796988666}}],
+                "next": None}
+        self.assertEqual(ORJSONRenderer().render(data), GeoJSONRenderer().render(data))
+        self.assertEqual(json.loads(ORJSONRenderer().render(data))["features"][0]["geometry"], geometry)
+
+        response = self.client.get("/api/buildings/?area")
+        self.assertEqual(response.content, GeoJSONRenderer().render(response.data))
+
+    def test_get_buildings_sparse_fields(self):
+        response = self.client.get("/api/buildings/?fields=id,address,area")
+        self.assertEqual(response.status_code, 200)
+        for feature in response.json()["features"]:
+            building = Building.objects.get(pk=feature["id"])
+            self.assertIsNone(feature["geometry"])
+            self.assertEqual(feature["properties"], {"address": building.address, "area": building.area})
+
+        response = self.client.get("/api/buildings/14/?fields=address,geometry")
+        self.assertEqual(response.json()["properties"], {"address": Building.objects.get(pk=14).address})
+        self.assertEqual(response.json()["geometry"]["type"], "Polygon")
+
+        response = self.client.get("/api/buildings/?fields=id,foo")
+        self.assertEqual(response.status_code, 400)
+
+    def test_get_buildings_without_geometry(self):
+        longitude, latitude = TEST_POINT1
+        response = self.client.get(f"/api/buildings/?geometry=false&{longitude=}&{latitude=}&max_distance=300")
+        self.assertEqual(response.status_code, 200)
+        features = response.json()["features"]
+        self.assertTrue(features)
+        for feature in features:
+            self.assertIn("geometry", feature)
+            self.assertIsNone(feature["geometry"])
+            self.assertIn("distance", feature["properties"])
+
+        response = self.client.get("/api/buildings/?geometry=false&stream")
+        self.assertTrue(all(feature["geometry"] is None
+                            for feature in json.loads(b"".join(response.streaming_content))["features"]))
+
     def test_get_target_building_not_found(self):
         url = "/api/buildings/50/"
 
@@ -128,7 +434,7 @@ class BuildingsCRUDTestsCollection(TestCase):
         self.assertEqual(response.status_code, 404)
 
 
-class BuildingsFilterTestsCollection(TestCase):
+class BuildingsFilterTestsCollection(BuildingsTestCase):
     fixtures = ["buildings"]
 
     def test_building_area(self):
@@ -138,6 +444,26 @@ class BuildingsFilterTestsCollection(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, "area", 1)
 
+    def test_create_and_update_keep_area_in_sync(self):
+        response = self.client.post("/api/buildings/?area", data={"address": "test", "geom": TEST_GEOM})
+        self.assertEqual(response.status_code, 201)
+        pk = response.json()["id"]
+        expected_area = Building.objects.annotate(expected_area=Area("geom")).get(pk=pk).expected_area.sq_m
+        self.assertAlmostEqual(Building.objects.get(pk=pk).area, expected_area)
+        self.assertAlmostEqual(response.json()["properties"]["area"], expected_area)
+
+        geo_json = {
+            "type": "Feature",
+            "geometry": {
+                "type": "Polygon",
+                "coordinates": [TEST_POLYGON[::-1]]
+            },
+            "properties": {"address": "test"}
+        }
+        self.client.put("/api/buildings/14/", data=geo_json, content_type="application/json")
+        expected_area = Building.objects.annotate(expected_area=Area("geom")).get(pk=14).expected_area.sq_m
+        self.assertAlmostEqual(Building.objects.get(pk=14).area, expected_area)
+
     def test_get_target_building_area_with_filter(self):
         min_area = 500
         url = f"/api/buildings/13/?area&{min_area=}"
@@ -224,6 +550,109 @@ class BuildingsFilterTestsCollection(TestCase):
                 distance_to_target_point = feature["properties"]["distance"]
                 self.assertLess(distance_to_target_point, max_distance)
 
+    def test_get_buildings_with_filter_point_partially_inside(self):
+        longitude, latitude = TEST_POINT1
+        ref_point = Point(longitude, latitude, srid=4326)
+
+        for max_distance in [50, 200, 1000]:
+            expected = set(Building.objects.annotate(distance=Distance("geom", ref_point))
+                           .filter(distance__lt=max_distance).values_list("pk", flat=True))
+
+            url = f"/api/buildings/?{max_distance=}&{longitude=}&{latitude=}"
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual({feature["id"] for feature in response.json()["features"]}, expected)
+
+    def test_get_buildings_with_filter_bbox(self):
+        bbox = (39.668, 47.205, 39.672, 47.212)
+        envelope = Polygon.from_bbox(bbox)
+        expected = {building.pk for building in Building.objects.all() if building.geom.intersects(envelope)}
+        self.assertTrue(expected)
+
+        response = self.client.get("/api/buildings/?bbox=" + ",".join(map(str, bbox)))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({feature["id"] for feature in response.json()["features"]}, expected)
+
+        response = self.client.get("/api/buildings/?min_area=2000&bbox=" + ",".join(map(str, bbox)))
+        self.assertEqual({feature["id"] for feature in response.json()["features"]},
+                         set(Building.objects.filter(pk__in=expected, area__gte=2000).values_list("pk", flat=True)))
+
+    def test_get_buildings_with_filter_bbox_antimeridian(self):
+        response = self.client.get("/api/buildings/?bbox=170,-10,-170,10")
+        self.assertEqual(len(response.json()["features"]), 0)
+
+        response = self.client.get("/api/buildings/?bbox=30,40,-170,50")
+        self.assertEqual(len(response.json()["features"]), Building.objects.count())
+
+    def test_get_buildings_with_wrong_format_filter_bbox(self):
+        for bbox in ("1,2,3", "a,b,c,d", "0,50,10,40", "0,0,200,10"):
+            response = self.client.get(f"/api/buildings/?bbox={bbox}")
+            self.assertEqual(response.status_code, 400)
+
+    def test_get_buildings_nearest(self):
+        longitude, latitude = TEST_POINT1
+        ref_point = Point(longitude, latitude, srid=4326)
+        expected = list(Building.objects.annotate(distance=Distance("geom", ref_point))
+                        .order_by("distance", "pk").values_list("pk", flat=True)[:2])
+
+        response = self.client.get(f"/api/buildings/?nearest=2&{longitude=}&{latitude=}")
+        self.assertEqual(response.status_code, 200)
+        features = response.json()["features"]
+        self.assertEqual([feature["id"] for feature in features], expected)
+        distances = [feature["properties"]["distance"] for feature in features]
+        self.assertEqual(distances, sorted(distances))
+
+        response = self.client.get(f"/api/buildings/?nearest=2&min_area=2000&{longitude=}&{latitude=}")
+        self.assertEqual(len(response.json()["features"]), 2)
+        self.assertTrue(all(feature["properties"]["area"] >= 2000 for feature in response.json()["features"]))
+
+    def test_get_buildings_nearest_paginated(self):
+        longitude, latitude = TEST_POINT1
+        ref_point = Point(longitude, latitude, srid=4326)
+        expected = list(Building.objects.annotate(distance=Distance("geom", ref_point))
+                        .order_by("distance", "pk").values_list("pk", flat=True)[:3])
+
+        url = f"/api/buildings/?nearest=3&page_size=2&{longitude=}&{latitude=}"
+        ids = []
+        while url is not None:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            ids += [feature["id"] for feature in data["features"]]
+            url = data["next"]
+        self.assertEqual(ids, expected)
+
+    def test_lookup_points_nearest(self):
+        points = [TEST_POINT1, TEST_POINT2, (0, 0)]
+        response = self.client.post("/api/buildings/lookup/", {"points": points, "k": 2, "max_distance": 3000},
+                                    content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual(len(results), len(points))
+
+        for point, result in zip(points[:2], results):
+            ref_point = Point(*point, srid=4326)
+            expected = list(Building.objects.annotate(distance=Distance("geom", ref_point))
+                            .order_by("distance", "pk").values_list("pk", flat=True)[:2])
+            self.assertEqual([building["id"] for building in result["buildings"]], expected)
+        self.assertEqual(results[2]["buildings"], [])
+
+    def test_lookup_points_contains(self):
+        building = Building.objects.get(pk=12)
+        inside = building.geom.point_on_surface
+        response = self.client.post("/api/buildings/lookup/",
+                                    {"points": [[inside.x, inside.y], TEST_POINT2], "mode": "contains"},
+                                    content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual([item["id"] for item in results[0]["buildings"]], [12])
+        self.assertEqual(results[0]["buildings"][0]["distance"], 0)
+
+    def test_lookup_points_wrong_format(self):
+        for data in ({"points": []}, {"points": [[1]]}, {"points": [[200, 0]]}, {"points": [[1, 2]], "k": 0}):
+            response = self.client.post("/api/buildings/lookup/", data, content_type="application/json")
+            self.assertEqual(response.status_code, 400)
+
     def test_get_calc_field_area(self):
         url = f"/api/buildings/13/?area&"
         response = self.client.get(url)
@@ -236,3 +665,448 @@ class BuildingsFilterTestsCollection(TestCase):
         response = self.client.get(url)
         data = response.json()
         self.assertIsInstance(data["properties"].get("distance"), float)
+
+
+class BuildingsInstrumentationTestsCollection(BuildingsTestCase):
+    fixtures = ["buildings"]
+
+    def test_server_timing(self):
+        response = self.client.get("/api/buildings/14/")
+        timings = dict(item.strip().split(";", 1) for item in response["Server-Timing"].split(","))
+        self.assertEqual(set(timings), {"db", "serialize", "render", "total"})
+        self.assertIn('desc="1 queries"', timings["db"])
+
+        with self.assertLogs("api_buldings.instrumentation", "INFO") as logs:
+            self.client.get("/api/buildings/?area")
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(record["action"], "list")
+        self.assertEqual(record["rows"], Building.objects.count())
+        self.assertGreaterEqual(record["queries"], 1)
+
+    def test_metrics_endpoint(self):
+        self.client.get("/api/buildings/")
+        self.client.get("/api/buildings/50/")
+
+        response = self.client.get("/api/metrics/")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        content = response.content.decode()
+        self.assertIn('buildings_request_duration_seconds_bucket{action="list",le="+Inf"}', content)
+        self.assertIn('buildings_request_duration_seconds_count{action="retrieve"}', content)
+        self.assertIn("buildings_response_cache_hits_total", content)
+
+    def test_metrics_endpoint_restricted(self):
+        self.assertEqual(self.client.get("/api/metrics/", REMOTE_ADDR="10.1.2.3").status_code, 403)
+        with override_settings(BUILDINGS_METRICS_ALLOWED_IPS=["10.0.0.0/8"]):
+            self.assertEqual(self.client.get("/api/metrics/", REMOTE_ADDR="10.1.2.3").status_code, 200)
+            self.assertEqual(self.client.get("/api/metrics/").status_code, 403)
+
+    def test_streaming_recorded_after_body(self):
+        with self.assertLogs("api_buldings.instrumentation", "INFO") as logs:
+            response = self.client.get("/api/buildings/?stream")
+            self.assertFalse(response.has_header("Server-Timing"))
+            logged = len(logs.records)
+            b"".join(response.streaming_content)
+        self.assertEqual(len(logs.records), logged + 1)
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(record["action"], "list")
+        self.assertGreaterEqual(record["queries"], 1)
+
+
+class BuildingsAsyncTestsCollection(BuildingsTestCase):
+    fixtures = ["buildings"]
+
+    async def get_content(self, response):
+        return b"".join([chunk async for chunk in response.streaming_content])
+
+    async def test_async_list(self):
+        longitude, latitude = TEST_POINT1
+        query = f"?{longitude=}&{latitude=}&max_distance=300&area"
+
+        response = await self.async_client.get("/api/async/buildings/" + query)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/json")
+        expected = (await self.async_client.get("/api/buildings/" + query)).json()
+        self.assertEqual(json.loads(await self.get_content(response)), expected)
+
+    async def test_async_list_wrong_filter(self):
+        response = await self.async_client.get("/api/async/buildings/?bbox=1,2,3")
+        self.assertEqual(response.status_code, 400)
+
+        response = await self.async_client.post("/api/async/buildings/")
+        self.assertEqual(response.status_code, 405)
+
+    async def test_async_retrieve(self):
+        response = await self.async_client.get("/api/async/buildings/14/")
+        self.assertEqual(response.status_code, 200)
+        expected = await self.async_client.get("/api/buildings/14/")
+        self.assertEqual(response.content, expected.content)
+        self.assertEqual(response["ETag"], expected["ETag"])
+
+        response = await self.async_client.get("/api/async/buildings/14/", headers={"If-None-Match": response["ETag"]})
+        self.assertEqual(response.status_code, 304)
+
+        response = await self.async_client.get("/api/async/buildings/50/")
+        self.assertEqual(response.status_code, 404)
+
+
+class BuildingsChangesTestsCollection(BuildingsTestCase):
+    fixtures = ["buildings"]
+
+    def test_changes_feed(self):
+        url = "/api/buildings/changes/"
+        cursor = self.client.get(url).json()["cursor"]
+
+        created = self.client.post("/api/buildings/", data={"address": "test", "geom": TEST_GEOM},
+                                   content_type="application/json").json()["id"]
+        self.client.put("/api/buildings/14/", data={"address": "new address", "geom": TEST_GEOM},
+                        content_type="application/json")
+        self.client.put("/api/buildings/13/", data={"address": "new address", "geom": TEST_GEOM},
+                        content_type="application/json")
+        self.client.delete("/api/buildings/13/")
+
+        response = self.client.get(url, {"since": cursor})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["type"], "FeatureCollection")
+        self.assertEqual([feature["id"] for feature in data["features"]], [14, created])
+        self.assertEqual(data["deleted"], [13])
+        self.assertFalse(data["has_more"])
+
+        response = self.client.get(url, {"since": data["cursor"]}).json()
+        self.assertEqual((response["features"], response["deleted"]), ([], []))
+        self.assertEqual(response["cursor"], data["cursor"])
+
+        response = self.client.get(url, {"since": cursor, "limit": 1}).json()
+        self.assertEqual([feature["id"] for feature in response["features"]], [created])
+        self.assertTrue(response["has_more"])
+
+    def test_changes_feed_bulk(self):
+        cursor = self.client.get("/api/buildings/changes/").json()["cursor"]
+        feature = {"type": "Feature", "geometry": json.loads(GEOSGeometry(TEST_GEOM).json),
+                   "properties": {"address": "bulk"}}
+        self.client.post("/api/buildings/bulk/", data=[feature, dict(feature, id=15)],
+                         content_type="application/json")
+
+        data = self.client.get("/api/buildings/changes/", {"since": cursor}).json()
+        self.assertEqual(len(data["features"]), 2)
+        self.assertIn(15, [feature["id"] for feature in data["features"]])
+
+    def test_record_holds_changes_lock(self):
+        BuildingChange.objects.record([14], BuildingChange.Action.UPDATED)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT count(*) FROM pg_locks WHERE locktype = 'advisory' AND pid = pg_backend_pid()")
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+    def test_changes_feed_wrong_cursor(self):
+        for params in ({"since": -1}, {"since": "abc"}, {"limit": 0}):
+            response = self.client.get("/api/buildings/changes/", params)
+            self.assertEqual(response.status_code, 400)
+
+
+class BuildingsTilesTestsCollection(BuildingsTestCase):
+    fixtures = ["buildings"]
+
+    def get_tile_url(self, longitude, latitude, z):
+        n = 2 ** z
+        x = floor((longitude + 180) / 360 * n)
+        y = floor((1 - asinh(tan(radians(latitude))) / pi) / 2 * n)
+        return f"/api/buildings/tiles/{z}/{x}/{y}.mvt"
+
+    def test_get_tile(self):
+        url = self.get_tile_url(*TEST_POINT1, 12)
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/vnd.mapbox-vector-tile")
+        self.assertGreater(len(response.content), 0)
+
+        response = self.client.get(url + "?min_area=100000")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.content), 0)
+
+    def test_get_tile_not_found(self):
+        response = self.client.get("/api/buildings/tiles/1/5/0.mvt")
+        self.assertEqual(response.status_code, 404)
+
+    def test_tile_cache_invalidation(self):
+        self.client.get(self.get_tile_url(*TEST_POINT1, 12))
+        self.client.get(self.get_tile_url(0, 0, 12))
+        self.assertEqual(len(tile_cache), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete("/api/buildings/13/")
+            self.assertEqual(len(tile_cache), 2)
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(len(tile_cache), 1)
+
+
+class BuildingsResponseCacheTestsCollection(BuildingsTestCase):
+    fixtures = ["buildings"]
+
+    def test_list_cache_hit(self):
+        response = self.client.get("/api/buildings/?min_area=1000")
+        self.assertEqual(response["X-Cache"], "MISS")
+
+        cached = self.client.get("/api/buildings/?min_area=1000.0")
+        self.assertEqual(cached["X-Cache"], "HIT")
+        self.assertEqual(cached.content, response.content)
+
+        response = self.client.get("/api/buildings/?min_area=2000")
+        self.assertEqual(response["X-Cache"], "MISS")
+
+    def test_retrieve_cache_invalidation(self):
+        self.client.get("/api/buildings/12/")
+        self.assertEqual(self.client.get("/api/buildings/12/")["X-Cache"], "HIT")
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            response = self.client.put("/api/buildings/12/", {"address": "new address", "geom": TEST_GEOM},
+                                       content_type="application/json")
+            self.assertEqual(self.client.get("/api/buildings/12/")["X-Cache"], "HIT")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(response_cache.invalidate, callbacks)
+
+        response = self.client.get("/api/buildings/12/")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["properties"]["address"], "new address")
+
+    def test_changes_generation(self):
+        backend = ChangesGenerationBackend()
+        generation = backend.get_generation()
+        BuildingChange.objects.record([14], BuildingChange.Action.UPDATED)
+        self.assertNotEqual(backend.get_generation(), generation)
+
+    def test_normalize_params(self):
+        self.assertEqual(normalize_params(QueryDict("longitude=39.670&latitude=47.2&max_distance=10")),
+                         normalize_params(QueryDict("max_distance=10.0&latitude=47.20&longitude=39.67")))
+
+
+class BuildingsCommandsTestsCollection(BuildingsTestCase):
+    fixtures = ["buildings"]
+
+    def test_import_buildings_geojsonl(self):
+        feature = {
+            "type": "Feature",
+            "geometry": {
+                "type": "Polygon",
+                "coordinates": [TEST_POLYGON]
+            },
+            "properties": {"address": "imported"}
+        }
+        not_closed_feature = {
+            "type": "Feature",
+            "geometry": {
+                "type": "Polygon",
+                "coordinates": [NOT_CLOSED_POLYGON]
+            },
+            "properties": {"address": "imported"}
+        }
+        count = Building.objects.count()
+        Building.objects.filter(pk=14).update(area=None)
+        last_change = BuildingChange.objects.aggregate(last=Max("pk", default=0))["last"]
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "buildings.geojsonl")
+            rejected_path = os.path.join(directory, "rejected.jsonl")
+            with open(path, "w") as file:
+                for item in [feature, not_closed_feature, feature]:
+                    file.write(json.dumps(item) + "\n")
+
+            call_command("import_buildings", path, workers=0, rejected=rejected_path, stdout=StringIO())
+
+            with open(rejected_path) as file:
+                rejected = [json.loads(line) for line in file]
+
+        self.assertEqual(Building.objects.count(), count + 2)
+        self.assertEqual([item["record"] for item in rejected], [2])
+        self.assertEqual(Building.objects.filter(address="imported", area__isnull=False).count(), 2)
+        self.assertIsNone(Building.objects.get(pk=14).area)
+        self.assertEqual(sorted(BuildingChange.objects.filter(pk__gt=last_change).values_list("building_id", flat=True)),
+                         sorted(Building.objects.filter(address="imported").values_list("pk", flat=True)))
+
+    def test_import_buildings_csv(self):
+        count = Building.objects.count()
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "buildings.csv")
+            with open(path, "w", newline="") as file:
+                writer = csv.writer(file)
+                writer.writerow(["address", "wkt"])
+                writer.writerow(["imported, 1", TEST_GEOM])
+                writer.writerow(["imported, 2", TEST_GEOM])
+                writer.writerow(["imported, 3", "POLYGON ((200 0, 201 0, 201 1, 200 0))"])
+
+            call_command("import_buildings", path, workers=0, batch_size=1, stdout=StringIO())
+
+        self.assertEqual(Building.objects.count(), count + 2)
+        self.assertEqual(Building.objects.get(address="imported, 2").geom.wkt, GEOSGeometry(TEST_GEOM).wkt)
+
+    def test_export_buildings_geojsonl(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "buildings.geojsonl")
+            call_command("export_buildings", path, filter=["min_area=1000"], stdout=StringIO())
+
+            with open(path) as file:
+                features = [json.loads(line) for line in file]
+
+        expected = list(Building.objects.filter(area__gte=1000).order_by("pk").values_list("pk", flat=True))
+        self.assertEqual([feature["id"] for feature in features], expected)
+        for feature in features:
+            self.assertEqual(feature["type"], "Feature")
+            self.assertEqual(feature["geometry"]["type"], "Polygon")
+            self.assertGreaterEqual(feature["properties"]["area"], 1000)
+
+    def test_export_endpoint(self):
+        response = self.client.get("/api/buildings/export/?format=geojsonl")
+        self.assertEqual(response.status_code, 200)
+        lines = b"".join(response.streaming_content).splitlines()
+        self.assertEqual(len(lines), Building.objects.count())
+
+    def test_export_flatgeobuf(self):
+        response = self.client.get("/api/buildings/export/?format=fgb")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="buildings.fgb"')
+        self.assertTrue(b"".join(response.streaming_content).startswith(b"fgb\x03fgb"))
+
+    def test_binary_format_unavailable(self):
+        with patch.object(GeoArrowRenderer, "available", return_value=False):
+            self.assertEqual(self.client.get("/api/buildings/?format=arrow").status_code, 404)
+
+
+class BuildingsBinaryFormatsTestsCollection(BuildingsTestCase):
+    fixtures = ["buildings"]
+
+    @skipUnless(find_spec("osgeo"), "GDAL Python bindings are not installed")
+    def test_list_flatgeobuf(self):
+        from osgeo import ogr
+
+        longitude, latitude = TEST_POINT1
+        response = self.client.get(f"/api/buildings/?format=fgb&{longitude=}&{latitude=}")
+        self.assertEqual(response.status_code, 200)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "buildings.fgb")
+            with open(path, "wb") as file:
+                file.writelines(response.streaming_content)
+            dataset = ogr.Open(path)
+            layer = dataset.GetLayer()
+            self.assertEqual(layer.GetSpatialRef().GetAuthorityCode(None), "4326")
+            features = [(feature.GetField("id"), feature.GetField("address"), feature.GetField("area"),
+                         feature.GetField("distance"), feature.GetGeometryRef().ExportToWkb())
+                        for feature in layer]
+            del layer, dataset
+
+        ref_point = Point(longitude, latitude, srid=4326)
+        expected = Building.objects.annotate(distance=Distance("geom", ref_point)).order_by("pk")
+        self.assertEqual([feature[0] for feature in features], [building.pk for building in expected])
+        for (pk, address, area, distance, wkb), building in zip(features, expected):
+            self.assertEqual(address, building.address)
+            self.assertAlmostEqual(area, building.area)
+            self.assertAlmostEqual(distance, building.distance.m)
+            self.assertTrue(GEOSGeometry(bytes(wkb)).equals_exact(building.geom, 1e-12))
+
+    @skipUnless(find_spec("pyarrow"), "pyarrow is not installed")
+    def test_list_geoarrow_distance(self):
+        import pyarrow as pa
+
+        longitude, latitude = TEST_POINT1
+        response = self.client.get(f"/api/buildings/?{longitude=}&{latitude=}",
+                                   HTTP_ACCEPT="application/vnd.apache.arrow.stream")
+        self.assertEqual(response.status_code, 200)
+        table = pa.ipc.open_stream(b"".join(response.streaming_content)).read_all()
+        self.assertEqual(table.column_names, ["id", "address", "area", "distance", "geometry"])
+
+        ref_point = Point(longitude, latitude, srid=4326)
+        expected = Building.objects.annotate(distance=Distance("geom", ref_point)).order_by("pk")
+        for row, building in zip(table.to_pylist(), expected, strict=True):
+            self.assertEqual(row["id"], building.pk)
+            self.assertEqual(row["address"], building.address)
+            self.assertAlmostEqual(row["distance"], building.distance.m)
+            self.assertTrue(GEOSGeometry(row["geometry"]).equals_exact(building.geom, 1e-12))
+
+    def test_binary_formats_not_paginated(self):
+        for param in ("page_size=10", "cursor=MQ"):
+            response = self.client.get(f"/api/buildings/?format=fgb&{param}")
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response["Content-Type"], "application/json")
+
+    @skipUnless(find_spec("pyarrow"), "pyarrow is not installed")
+    def test_list_geoarrow_and_geoparquet(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        response = self.client.get("/api/buildings/?min_area=1000", HTTP_ACCEPT="application/vnd.apache.arrow.stream")
+        self.assertEqual(response.status_code, 200)
+        table = pa.ipc.open_stream(b"".join(response.streaming_content)).read_all()
+        self.assertEqual(table.column_names, ["id", "address", "area", "geometry"])
+        self.assertEqual(table["id"].to_pylist(),
+                         list(Building.objects.filter(area__gte=1000).order_by("pk").values_list("pk", flat=True)))
+        self.assertEqual(table.schema.field("geometry").metadata[b"ARROW:extension:name"], b"geoarrow.wkb")
+
+        response = self.client.get("/api/buildings/?format=parquet")
+        self.assertEqual(response.status_code, 200)
+        table = pq.read_table(BytesIO(b"".join(response.streaming_content)))
+        self.assertEqual(table.num_rows, Building.objects.count())
+        self.assertEqual(json.loads(table.schema.metadata[b"geo"])["primary_column"], "geometry")
+
+    def test_binary_formats_only_for_list(self):
+        response = self.client.get("/api/buildings/14/?format=fgb")
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(BUILDINGS_READ_REPLICAS=["replica_0"], BUILDINGS_REPLICA_STICKY_SECONDS=5)
+class BuildingsReplicaRoutingTestsCollection(SimpleTestCase):
+    def get_queryset(self, action, cookies=None):
+        request = RequestFactory().get("/api/buildings/")
+        request.COOKIES.update(cookies or {})
+        view = BuildingViewSet(action=action, request=request)
+        return view.get_queryset()
+
+    def test_reads_go_to_replica(self):
+        self.assertEqual(self.get_queryset("list").db, "replica_0")
+        self.assertEqual(self.get_queryset("retrieve").db, "replica_0")
+        self.assertEqual(self.get_queryset("update").db, "default")
+        self.assertEqual(self.get_queryset("changes").db, "default")
+
+    def test_sticky_after_write(self):
+        self.assertEqual(self.get_queryset("list", {STICKY_COOKIE: "1"}).db, "default")
+
+        middleware = ReplicaStickinessMiddleware(lambda request: HttpResponse(status=201))
+        response = middleware(RequestFactory().post("/api/buildings/"))
+        self.assertEqual(response.cookies[STICKY_COOKIE]["max-age"], 5)
+
+        response = middleware(RequestFactory().get("/api/buildings/"))
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+
+        middleware = ReplicaStickinessMiddleware(lambda request: HttpResponse(status=400))
+        response = middleware(RequestFactory().post("/api/buildings/"))
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+
+    def test_read_only_post_not_sticky(self):
+        middleware = ReplicaStickinessMiddleware(lambda request: HttpResponse(status=200))
+        for path, sticky in (("/api/buildings/lookup/", False), ("/api/buildings/bulk/", True)):
+            request = RequestFactory().post(path)
+            request.resolver_match = resolve(path)
+            self.assertEqual(STICKY_COOKIE in middleware(request).cookies, sticky)
+
+    def test_cache_key_per_database(self):
+        with patch.object(response_cache, "make_key", wraps=response_cache.make_key) as make_key:
+            for cookies in ({}, {STICKY_COOKIE: "1"}):
+                request = RequestFactory().get("/api/buildings/12/")
+                request.COOKIES.update(cookies)
+                view = BuildingViewSet(action="retrieve", request=Request(request))
+                view.request.accepted_renderer = ORJSONRenderer()
+                view.get_cached_response(lambda: Response(status=404))
+        self.assertEqual([call.args[1] for call in make_key.call_args_list], ["replica_0", "default"])
+
+    @override_settings(BUILDINGS_READ_REPLICAS=[])
+    def test_without_replicas(self):
+        self.assertEqual(self.get_queryset("list").db, "default")
+        middleware = ReplicaStickinessMiddleware(lambda request: HttpResponse(status=201))
+        self.assertNotIn(STICKY_COOKIE, middleware(RequestFactory().post("/api/buildings/")).cookies)
+
+    def test_router(self):
+        router = PrimaryReplicaRouter()
+        self.assertEqual(router.db_for_write(Building), "default")
+        self.assertIsNone(router.db_for_read(Building))
+        self.assertFalse(router.allow_migrate("replica_0", "api_buldings"))
+        self.assertIsNone(router.allow_migrate("default", "api_buldings"))
@@ -0,0 +1,75 @@
+from math import atan, degrees, pi, sinh
+
+from django.contrib.gis.geos import Polygon
+from django.db import connection, models
+from django.db.models import Func
+
+from api_buldings.cache import LRUCache
+from api_buldings.models import planar_geom
+
+TILE_LAYER = "buildings"
+TILE_EXTENT = 4096
+TILE_BUFFER = 256
+TILE_MAX_ZOOM = 22
+TILE_CACHE_MAX_ENTRIES = 4096
+TILE_CACHE_TIMEOUT = 300
+
+tile_cache = LRUCache(TILE_CACHE_MAX_ENTRIES, timeout=TILE_CACHE_TIMEOUT)
+
+
+class AsMVTGeom(Func):
+    function = "ST_AsMVTGeom"
+    template = "%(function)s(ST_Transform(%(expressions)s, 3857), ST_TileEnvelope(%(z)d, %(x)d, %(y)d), %(extent)d, %(buffer)d, true)"
+    output_field = models.BinaryField()
+
+
+def tile_exists(z, x, y):
+    return z <= TILE_MAX_ZOOM and x < 2 ** z and y < 2 ** z
+
+
+def tile_bounds(z, x, y, buffer=TILE_BUFFER):
+    n = 2 ** z
+    margin = buffer / TILE_EXTENT
+    west = (x - margin) / n * 360.0 - 180.0
+    east = (x + 1 + margin) / n * 360.0 - 180.0
+    north = degrees(atan(sinh(pi * (1 - 2 * (y - margin) / n))))
+    south = degrees(atan(sinh(pi * (1 - 2 * (y + 1 + margin) / n))))
+    return max(west, -180.0), max(south, -90.0), min(east, 180.0), min(north, 90.0)
+
+
+def render_tile(queryset, z, x, y):
+    envelope = Polygon.from_bbox(tile_bounds(z, x, y))
+    envelope.srid = 4326
+    rows = (queryset.alias(planar_geom=planar_geom())
+            .filter(planar_geom__intersects=envelope)
+            .annotate(mvt_geom=AsMVTGeom("planar_geom", z=z, x=x, y=y, extent=TILE_EXTENT, buffer=TILE_BUFFER))
+            .values("id", "address", "area", "mvt_geom"))
+    sql, params = rows.query.sql_with_params()
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT ST_AsMVT(tile, %s, %s, 'mvt_geom', 'id') FROM ({sql}) AS tile",
+                       [TILE_LAYER, TILE_EXTENT, *params])
+        tile = cursor.fetchone()[0]
+    return bytes(tile or b"")
+
+
+def get_tile(queryset, z, x, y, params):
+    key = (z, x, y, params)
+    tile = tile_cache.get(key)
+    if tile is None:
+        tile = render_tile(queryset, z, x, y)
+        tile_cache.set(key, tile)
+    return tile
+
+
+def invalidate_tiles(extents):
+    extents = [extent for extent in extents if extent is not None]
+    if not extents:
+        return 0
+
+    def touches(key):
+        west, south, east, north = tile_bounds(*key[:3])
+        return any(extent[0] <= east and extent[2] >= west and extent[1] <= north and extent[3] >= south
+                   for extent in extents)
+
+    return tile_cache.delete_if(touches)
@@ -1,12 +1,20 @@
 from django.urls import path, include
 from rest_framework import routers
 
+from api_buldings import async_views, instrumentation
+from api_buldings.renderers import MVTRenderer
 from api_buldings.views import BuildingViewSet
 
 router = routers.SimpleRouter()
 router.register(r"buildings", BuildingViewSet)
 
 
+tile_view = BuildingViewSet.as_view({"get": "tile"}, renderer_classes=[MVTRenderer])
+
 urlpatterns = [
+    path("buildings/tiles/<int:z>/<int:x>/<int:y>.mvt", tile_view, name="building-tile"),
+    path("metrics/", instrumentation.metrics_view, name="metrics"),
+    path("async/buildings/", async_views.building_list, name="async-building-list"),
+    path("async/buildings/<int:pk>/", async_views.building_retrieve, name="async-building-detail"),
     path("", include(router.urls), name="buildings"),
 ]
\ No newline at end of file
@@ -0,0 +1,115 @@
+import struct
+
+import numpy as np
+from django.contrib.gis.geos import GEOSGeometry, Polygon
+from rest_framework.exceptions import ValidationError
+
+MAX_POLYGON_VERTICES = 100000
+MIN_RING_VERTICES = 4
+COORDINATES_RANGE_MESSAGE = ("Coordinates out of range: longitude must be between -180 and 180, "
+                             "latitude must be between -90 and 90")
+
+
+def parse_polygon(value):
+    try:
+        polygon = GEOSGeometry(value)
+    except Exception as e:
+        raise ValidationError([str(e)])
+
+    if not isinstance(polygon, Polygon):
+        raise ValidationError(["geom must be a Polygon"])
+    return polygon
+
+
+def wkb_rings(wkb):
+    # Zero-copy (n, 2) views of every ring of a WKB (ISO or EWKB, without SRID) polygon.
+    wkb = memoryview(wkb)
+    byteorder = "<" if wkb[0] == 1 else ">"
+    (geometry_type,) = struct.unpack_from(byteorder + "I", wkb, 1)
+    dims = 3 if geometry_type & 0x80000000 or 1000 <= geometry_type < 2000 else 2
+    (count,) = struct.unpack_from(byteorder + "I", wkb, 5)
+    offset = 9
+    rings = []
+    for _ in range(count):
+        (points,) = struct.unpack_from(byteorder + "I", wkb, offset)
+        offset += 4
+        ring = np.frombuffer(wkb, dtype=byteorder + "f8", count=points * dims, offset=offset)
+        rings.append(ring.reshape(points, dims)[:, :2])
+        offset += points * dims * 8
+    return rings
+
+
+def polygon_rings(polygon):
+    return wkb_rings(polygon.wkb)
+
+
+def coordinates_in_range(coords):
+    return (np.abs(coords[:, 0]) <= 180.0) & (np.abs(coords[:, 1]) <= 90.0)
+
+
+def check_rings(rings):
+    if not rings:
+        return "geom is empty"
+
+    vertices = sum(len(ring) for ring in rings)
+    if vertices > MAX_POLYGON_VERTICES:
+        return f"geom has {vertices} vertices, at most {MAX_POLYGON_VERTICES} are allowed"
+
+    for index, ring in enumerate(rings):
+        if len(ring) < MIN_RING_VERTICES:
+            return f"ring {index} has fewer than {MIN_RING_VERTICES} vertices"
+        if not np.isfinite(ring).all():
+            return f"ring {index} has non-finite coordinates"
+        # all vertices on one line (or one point) enclose no area
+        if np.linalg.matrix_rank(ring - ring[0]) < 2:
+            return f"ring {index} is degenerate"
+    return None
+
+
+def check_validity(polygon):
+    if not polygon.valid:
+        return f"geom is not a valid polygon: {polygon.valid_reason}"
+    return None
+
+
+def validate_polygon(value):
+    polygon = parse_polygon(value)
+    rings = polygon_rings(polygon)
+
+    error = check_rings(rings)
+    if error is None and not coordinates_in_range(np.concatenate(rings)).all():
+        error = COORDINATES_RANGE_MESSAGE
+    if error is None:
+        error = check_validity(polygon)
+    if error is not None:
+        raise ValidationError([error])
+    return polygon
+
+
+def validate_polygons(values):
+    """Validate many geometries at once, returns a (polygon, None) or (None, errors) pair per value."""
+    results = [None] * len(values)
+    parsed = []
+    for index, value in enumerate(values):
+        try:
+            polygon = parse_polygon(value)
+        except ValidationError as e:
+            results[index] = None, e.detail
+            continue
+        rings = polygon_rings(polygon)
+        error = check_rings(rings)
+        if error is not None:
+            results[index] = None, [error]
+            continue
+        parsed.append((index, polygon, np.concatenate(rings)))
+
+    if parsed:
+        # One range check over the coordinates of the whole batch.
+        lengths = [len(coords) for _, _, coords in parsed]
+        starts = np.cumsum([0] + lengths[:-1])
+        in_range = np.logical_and.reduceat(coordinates_in_range(np.concatenate([coords for _, _, coords in parsed])),
+                                           starts)
+        for (index, polygon, _), ok in zip(parsed, in_range):
+            error = COORDINATES_RANGE_MESSAGE if not ok else check_validity(polygon)
+            results[index] = (polygon, None) if error is None else (None, [error])
+    return results
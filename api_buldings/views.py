@@ -1,12 +1,79 @@
+import hashlib
+
 import django_filters
 from django.contrib.gis.geos import Point
-from django.http import Http404
-from rest_framework import viewsets
+from django.db import transaction
+from django.http import Http404, StreamingHttpResponse
+from django.utils.functional import cached_property
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import get_object_or_404
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
 
+from api_buldings.bulk import get_features, upsert_buildings
+from api_buldings.cache import normalize_params, response_cache
+from api_buldings.changes import get_changes
+from api_buldings.exporters import iter_flatgeobuf, iter_geoarrow_ipc, iter_geojsonl, iter_geoparquet
 from api_buldings.filters import BuildingFilter
-from api_buldings.models import Building
-from api_buldings.serializers import BuildingSerializer
+from api_buldings.instrumentation import timed
+from api_buldings.lookup import lookup_points
+from api_buldings.models import Building, BuildingChange
+from api_buldings.pagination import BuildingKeysetPagination
+from api_buldings.parsers import GeoJSONSeqParser, NDJSONParser
+from api_buldings.renderers import (BinaryRenderer, FlatGeobufRenderer, GeoArrowRenderer, GeoJSONLRenderer,
+                                    GeoParquetRenderer, ORJSONRenderer)
+from api_buldings.replicas import REPLICA_ACTIONS, get_read_database
+from api_buldings.serializers import (BuildingSerializer, ChangesQuerySerializer, GeometryOptionsSerializer,
+                                     PointLookupSerializer)
+from api_buldings.tiles import get_tile, invalidate_tiles, tile_exists
+
+
+CACHED_HEADERS = ("ETag",)
+LIST_BINARY_RENDERERS = [FlatGeobufRenderer, GeoArrowRenderer, GeoParquetRenderer]
+BINARY_EXPORTERS = {
+    FlatGeobufRenderer.format: (iter_flatgeobuf, "buildings.fgb"),
+    GeoArrowRenderer.format: (iter_geoarrow_ipc, None),
+    GeoParquetRenderer.format: (iter_geoparquet, "buildings.parquet"),
+}
+
+
+def etag_matches(request, etag):
+    if etag is None or "HTTP_IF_NONE_MATCH" not in request.META:
+        return False
+    etags = parse_etags(request.META["HTTP_IF_NONE_MATCH"])
+    return "*" in etags or etag.removeprefix("W/") in (tag.removeprefix("W/") for tag in etags)
+
+
+def make_etag(pk, version, renderer_format, query_params):
+    params = (renderer_format, normalize_params(query_params))
+    return quote_etag(hashlib.sha1(repr((pk, version, params)).encode()).hexdigest())
+
+
+def binary_response(content, renderer, filename=None):
+    response = StreamingHttpResponse(content, content_type=renderer.media_type)
+    if filename is not None:
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def build_serializer_context(query_params, geometry_options=False):
+    context = {}
+    if {"area", "min_area", "max_area"} & query_params.keys():
+        context["area"] = True
+    if "latitude" in query_params and "longitude" in query_params:
+        longitude = query_params.get('longitude')
+        latitude = query_params.get('latitude')
+        ref_point = Point(float(longitude), float(latitude), srid=4326)
+        context["target_point"] = ref_point
+    if geometry_options:
+        options = GeometryOptionsSerializer(data=query_params)
+        options.is_valid(raise_exception=True)
+        context.update(options.validated_data)
+    return context
 
 
 class BuildingViewSet(viewsets.ModelViewSet):
@@ -14,26 +81,177 @@ class BuildingViewSet(viewsets.ModelViewSet):
     serializer_class: BuildingSerializer = BuildingSerializer
     filter_backends = [django_filters.rest_framework.DjangoFilterBackend]
     filterset_class = BuildingFilter
+    renderer_classes = [ORJSONRenderer, BrowsableAPIRenderer]
+    pagination_class = BuildingKeysetPagination
+    # actions that don't write, the client isn't pinned to the primary after them (see replicas)
+    read_only = False
 
     def get_serializer_context(self):
-        context = {}
-        if "area" in self.request.query_params:
-            context["area"] = True
-        if "latitude" in self.request.query_params and "longitude" in self.request.query_params:
-            longitude = self.request.GET.get('longitude')
-            latitude = self.request.GET.get('latitude')
-            ref_point = Point(float(longitude), float(latitude), srid=4326)
-            context["target_point"] = ref_point
-        return context
+        return build_serializer_context(self.request.query_params, self.action in ("list", "retrieve"))
+
+    @cached_property
+    def read_database(self):
+        return get_read_database(self.request)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in REPLICA_ACTIONS:
+            queryset = queryset.using(self.read_database)
+        return queryset
+
+    def get_renderers(self):
+        renderers = super().get_renderers()
+        if self.action == "list":
+            renderers += [renderer() for renderer in LIST_BINARY_RENDERERS if renderer.available()]
+        return renderers
+
+    def handle_exception(self, exc):
+        response = super().handle_exception(exc)
+        if isinstance(getattr(self.request, "accepted_renderer", None), BinaryRenderer):
+            # error details are JSON whatever format was asked for
+            self.request.accepted_renderer = ORJSONRenderer()
+            self.request.accepted_media_type = ORJSONRenderer.media_type
+        return response
+
+    @transaction.atomic
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        BuildingChange.objects.record([serializer.instance.pk], BuildingChange.Action.CREATED)
+        extents = [serializer.instance.geom.extent]
+        # before the commit a tile request would render the old rows again
+        transaction.on_commit(lambda: invalidate_tiles(extents))
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        old_extent = serializer.instance.geom.extent
+        super().perform_update(serializer)
+        BuildingChange.objects.record([serializer.instance.pk], BuildingChange.Action.UPDATED)
+        extents = [old_extent, serializer.instance.geom.extent]
+        transaction.on_commit(lambda: invalidate_tiles(extents))
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        pk, extent = instance.pk, instance.geom.extent
+        super().perform_destroy(instance)
+        BuildingChange.objects.record([pk], BuildingChange.Action.DELETED)
+        transaction.on_commit(lambda: invalidate_tiles([extent]))
+
+    def get_cached_response(self, get_response):
+        params = normalize_params(self.request.query_params)
+        # A lagging replica must not fill the entry that a client pinned to the primary reads.
+        key = response_cache.make_key(self.action, self.read_database, self.request.get_host(), self.request.path,
+                                      self.request.accepted_renderer.format, params)
+        cached = response_cache.get(key)
+        if cached is not None:
+            data, headers = cached
+            if etag_matches(self.request, headers.get("ETag")):
+                response = Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+            else:
+                response = Response(data, headers=headers)
+            response["X-Cache"] = "HIT"
+            return response
+
+        response = get_response()
+        if response.status_code == status.HTTP_200_OK:
+            headers = {header: response[header] for header in CACHED_HEADERS if response.has_header(header)}
+            response_cache.set(key, (response.data, headers))
+        response["X-Cache"] = "MISS"
+        return response
 
     def retrieve(self, request, *args, **kwargs):
-        queryset = self.get_queryset().filter(pk=kwargs["pk"])
-        if len(queryset) != 1:
-            raise Http404("Building matching query does not exist")
-        feature = self.serializer_class(queryset, context=self.get_serializer_context()).data
-        return Response(feature)
+        return self.get_cached_response(self.get_retrieve_response)
+
+    def get_retrieve_response(self):
+        renderer_format = self.request.accepted_renderer.format
+        if "HTTP_IF_NONE_MATCH" in self.request.META:
+            # conditional requests compare the version first, a match doesn't encode the geometry
+            pk, version = get_object_or_404(self.get_queryset().values_list("pk", "version"), pk=self.kwargs["pk"])
+            etag = make_etag(pk, version, renderer_format, self.request.query_params)
+            if etag_matches(self.request, etag):
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+        serializer = self.serializer_class(context=self.get_serializer_context())
+        queryset = serializer.change_queryset_serializers_context(self.get_queryset())
+        instance = get_object_or_404(queryset, pk=self.kwargs["pk"])
+        etag = make_etag(instance.pk, instance.version, renderer_format, self.request.query_params)
+        with timed("serialize"):
+            feature = serializer.to_representation(instance)
+        return Response(feature, headers={"ETag": etag})
 
     def list(self, request, *args, **kwargs):
+        if isinstance(request.accepted_renderer, BinaryRenderer):
+            return self.get_binary_list_response(request.accepted_renderer)
+        if "stream" in request.query_params:
+            queryset = self.filter_queryset(self.get_queryset())
+            serializer = self.serializer_class(context=self.get_serializer_context(), single=False)
+            return StreamingHttpResponse(serializer.to_representation_stream(queryset),
+                                         content_type="application/json")
+        return self.get_cached_response(self.get_list_response)
+
+    def get_binary_list_response(self, renderer):
+        # binary formats stream the whole filtered set, there is nowhere to put a next page link
+        paginator = self.paginator
+        for param in (paginator.page_size_query_param, paginator.cursor_query_param):
+            if param in self.request.query_params:
+                raise ValidationError({param: f"Pagination is not supported with format={renderer.format}"})
+
+        queryset = self.filter_queryset(self.get_queryset())
+        target_point = self.get_serializer_context().get("target_point")
+        exporter, filename = BINARY_EXPORTERS[renderer.format]
+        return binary_response(exporter(queryset, target_point), renderer, filename)
+
+    def get_list_response(self):
         queryset = self.filter_queryset(self.get_queryset())
-        feature_collection = self.serializer_class(queryset, context=self.get_serializer_context(), single=False).data
+        context = self.get_serializer_context()
+        serializer = self.serializer_class(context=context, single=False)
+
+        page = self.paginate_queryset(serializer.change_queryset_serializers_context(queryset))
+        if page is not None:
+            with timed("serialize"):
+                feature_collection = self.serializer_class(page, context=context, single=False).data
+            return self.get_paginated_response(feature_collection)
+
+        with timed("serialize"):
+            feature_collection = self.serializer_class(queryset, context=context, single=False).data
         return Response(feature_collection)
+
+    @action(detail=False, methods=["post"], parser_classes=[JSONParser, NDJSONParser, GeoJSONSeqParser])
+    def bulk(self, request, *args, **kwargs):
+        result, extents = upsert_buildings(get_features(request.data))
+        transaction.on_commit(lambda: invalidate_tiles(extents))
+        transaction.on_commit(response_cache.invalidate)
+        if result["errors"] and not (result["created"] or result["updated"]):
+            return Response(result, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result)
+
+    @action(detail=False, methods=["post"], parser_classes=[JSONParser], read_only=True)
+    def lookup(self, request, *args, **kwargs):
+        serializer = PointLookupSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response({"results": lookup_points(**serializer.validated_data)})
+
+    @action(detail=False)
+    def changes(self, request, *args, **kwargs):
+        params = ChangesQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        changed, deleted, cursor, has_more = get_changes(**params.validated_data)
+
+        queryset = self.get_queryset().filter(pk__in=changed).order_by("pk")
+        with timed("serialize"):
+            data = self.serializer_class(queryset, context=self.get_serializer_context(), single=False).data
+        data.update(deleted=deleted, cursor=cursor, has_more=has_more)
+        return Response(data)
+
+    @action(detail=False, renderer_classes=[GeoJSONLRenderer, FlatGeobufRenderer])
+    def export(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        if request.accepted_renderer.format == FlatGeobufRenderer.format:
+            return binary_response(iter_flatgeobuf(queryset), request.accepted_renderer, "buildings.fgb")
+        return StreamingHttpResponse(iter_geojsonl(queryset), content_type=GeoJSONLRenderer.media_type)
+
+    def tile(self, request, z, x, y, *args, **kwargs):
+        if not tile_exists(z, x, y):
+            raise Http404("Tile does not exist")
+        queryset = self.filter_queryset(self.get_queryset())
+        params = tuple((key, tuple(values)) for key, values in sorted(request.query_params.lists()))
+        return Response(get_tile(queryset, z, x, y, params))
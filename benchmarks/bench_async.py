@@ -0,0 +1,87 @@
+"""Load comparison of the WSGI and ASGI code paths of the buildings API.
+
+Start the same project twice, e.g.
+
+    gunicorn server.wsgi -w 1 --threads 8 -b 127.0.0.1:8000
+    uvicorn server.asgi:application --workers 1 --port 8001
+
+and run
+
+    python benchmarks/bench_async.py --wsgi http://127.0.0.1:8000/api/buildings/ \\
+        --asgi http://127.0.0.1:8001/api/async/buildings/ --concurrency 64 --requests 2000
+
+The default query is a geodesic radius filter, the slow case the async path is meant for. "stream" is
+added to every query: the WSGI list then streams like the async one and skips the response cache,
+so both sides run the query and the serialization on every request.
+"""
+import argparse
+import json
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_QUERY = "longitude=39.67&latitude=47.21&max_distance=3000&area"
+
+
+def fetch(url):
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url) as response:
+            size = len(response.read())
+            status = response.status
+    except urllib.error.HTTPError as e:
+        size = len(e.read())
+        status = e.code
+    return time.perf_counter() - started, status, size
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run(url, requests, concurrency):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        results = list(executor.map(fetch, [url] * requests))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for latency, _, _ in results)
+    return {
+        "url": url,
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": sum(status != 200 for _, status, _ in results),
+        "bytes": sum(size for _, _, size in results),
+        "rps": requests / elapsed,
+        "mean_ms": statistics.fmean(latencies) * 1e3,
+        "p50_ms": percentile(latencies, 0.5) * 1e3,
+        "p99_ms": percentile(latencies, 0.99) * 1e3,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--wsgi", default="http://127.0.0.1:8000/api/buildings/")
+    parser.add_argument("--asgi", default="http://127.0.0.1:8001/api/async/buildings/")
+    parser.add_argument("--query", default=DEFAULT_QUERY)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--json", action="store_true", help="print results as JSON lines")
+    args = parser.parse_args()
+
+    query = f"{args.query}&stream" if args.query else "stream"
+    for concurrency in args.concurrency:
+        for name, base in (("wsgi", args.wsgi), ("asgi", args.asgi)):
+            fetch(f"{base}?{query}")  # warm up connections
+            result = dict(run(f"{base}?{query}", args.requests, concurrency), path=name)
+            if args.json:
+                print(json.dumps(result))
+            else:
+                print(f"{name} c={concurrency:<4} {result['rps']:>8.1f} req/s  p50 {result['p50_ms']:>8.1f} ms  "
+                      f"p99 {result['p99_ms']:>8.1f} ms  errors {result['errors']}")
+
+
+if __name__ == "__main__":
+    main()
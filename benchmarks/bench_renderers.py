@@ -0,0 +1,77 @@
+"""Rendering throughput of large FeatureCollections.
+
+    python benchmarks/bench_renderers.py [--features 1000 10000] [--vertices 50]
+
+stdlib: DRF JSONRenderer re-encoding parsed coordinate lists (the original path),
+geojson: GeoJSONRenderer splicing RawJSON geometry, orjson: ORJSONRenderer with orjson.Fragment.
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+from math import cos, pi, sin
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "server.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from api_buldings.renderers import GeoJSONRenderer, ORJSONRenderer, RawJSON, load_raw  # noqa: E402
+
+
+def make_collection(features, vertices):
+    collection = {"type": "FeatureCollection", "features": []}
+    for pk in range(features):
+        lon, lat = 39.6 + pk % 100 * 1e-3, 47.2 + pk // 100 * 1e-3
+        ring = [[lon + 1e-4 * cos(2 * pi * i / vertices), lat + 1e-4 * sin(2 * pi * i / vertices)]
+                for i in range(vertices)]
+        geometry = {"type": "Polygon", "coordinates": [ring + ring[:1]]}
+        collection["features"].append({
+            "type": "Feature",
+            "geometry": RawJSON(json.dumps(geometry, separators=(",", ":"))),
+            "id": pk,
+            "properties": {"address": f"ул. Тестовая, {pk}", "area": 1000.0 + pk / 7},
+        })
+    return collection
+
+
+def measure(render, data, repeat):
+    return min(timeit.repeat(lambda: render(data), number=1, repeat=repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--features", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--vertices", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    renderers = {
+        "stdlib": (JSONRenderer().render, load_raw),
+        "geojson": (GeoJSONRenderer().render, None),
+        "orjson": (ORJSONRenderer().render, None),
+    }
+    for features in args.features:
+        collection = make_collection(features, args.vertices)
+        outputs, timings = {}, {}
+        for name, (render, prepare) in renderers.items():
+            data = prepare(collection) if prepare else collection
+            outputs[name] = render(data)
+            timings[name] = measure(render, data, args.repeat)
+        assert outputs["orjson"] == outputs["geojson"]
+
+        size = len(outputs["orjson"]) / 2 ** 20
+        print(f"{features} features, {size:.1f} MiB")
+        for name, elapsed in timings.items():
+            print(f"  {name:<8} {elapsed * 1e3:>9.1f} ms {size / elapsed:>8.1f} MiB/s "
+                  f"{timings['stdlib'] / elapsed:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
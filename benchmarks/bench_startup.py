@@ -0,0 +1,76 @@
+"""Worker boot time: fresh interpreters importing the WSGI or ASGI application, as gunicorn/uvicorn workers do.
+
+    python benchmarks/bench_startup.py --runs 20 --settings server.settings.production
+    python benchmarks/bench_startup.py --top 15
+
+"import" is the time to import the application module (settings, django.setup(), apps, URLconf),
+"process" the whole interpreter lifetime seen from outside. --top lists the slowest imports by
+cumulative time, from python -X importtime.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+CHILD = """
+import time
+started = time.perf_counter()
+import {module}
+print(time.perf_counter() - started)
+"""
+
+
+def boot(module, env):
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", CHILD.format(module=module)], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    return float(result.stdout.split()[-1]), time.perf_counter() - started
+
+
+def slowest_imports(module, env, top):
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        imports.append((int(cumulative) / 1e3, name.strip()))
+    return sorted(imports, reverse=True)[:top]
+
+
+def summary(values):
+    values = sorted(values)
+    return {
+        "min_ms": round(values[0] * 1e3, 1),
+        "median_ms": round(statistics.median(values) * 1e3, 1),
+        "max_ms": round(values[-1] * 1e3, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="server.wsgi", help="application module, e.g. server.asgi")
+    parser.add_argument("--settings", default=os.getenv("DJANGO_SETTINGS_MODULE", "server.settings"))
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=0, help="also list the N slowest imports")
+    args = parser.parse_args()
+
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=args.settings)
+    boot(args.module, env)  # warm the filesystem cache and the .pyc files
+    imports, processes = zip(*(boot(args.module, env) for _ in range(args.runs)))
+
+    report = {"module": args.module, "settings": args.settings, "runs": args.runs,
+              "import": summary(imports), "process": summary(processes)}
+    if args.top:
+        report["slowest_imports_ms"] = dict((name, ms) for ms, name in slowest_imports(args.module, env, args.top))
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Coordinate range check: the old per-vertex loop against the NumPy WKB view.
+
+    python benchmarks/bench_validation.py [--repeat N]
+"""
+import argparse
+import os
+import sys
+import timeit
+from math import cos, pi, sin
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "server.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+import numpy as np  # noqa: E402
+from django.contrib.gis.geos import Polygon  # noqa: E402
+
+from api_buldings.validators import coordinates_in_range, polygon_rings, validate_polygon  # noqa: E402
+
+SIZES = (10, 100, 1000, 10000, 100000)
+
+
+def make_polygon(vertices, radius=0.01):
+    steps = vertices - 1
+    points = [(39.67 + radius * cos(2 * pi * i / steps), 47.21 + radius * sin(2 * pi * i / steps))
+              for i in range(steps)]
+    return Polygon(points + points[:1], srid=4326)
+
+
+def loop_check(polygon):
+    for coord in polygon.coords[0]:
+        if not (-180.0 <= coord[0] <= 180.0 and -90.0 <= coord[1] <= 90.0):
+            return False
+    return True
+
+
+def vectorized_check(polygon):
+    return bool(coordinates_in_range(np.concatenate(polygon_rings(polygon))).all())
+
+
+def measure(func, polygon, repeat):
+    number = max(1, 20000 // len(polygon.coords[0]))
+    return min(timeit.repeat(lambda: func(polygon), number=number, repeat=repeat)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'vertices':>9} {'loop, ms':>10} {'numpy, ms':>10} {'speedup':>8} {'full, ms':>10}")
+    for vertices in SIZES:
+        polygon = make_polygon(vertices)
+        loop = measure(loop_check, polygon, args.repeat)
+        vectorized = measure(vectorized_check, polygon, args.repeat)
+        full = measure(validate_polygon, polygon, args.repeat)
+        print(f"{vertices:>9} {loop * 1e3:>10.3f} {vectorized * 1e3:>10.3f} {loop / vectorized:>7.1f}x "
+              f"{full * 1e3:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Diff two benchmarks/run.py reports, e.g. from the base branch and from a change.
+
+    python benchmarks/compare.py base.json head.json [--threshold 10]
+
+Exits with status 1 when a p99 latency grows, or throughput drops, by more than --threshold percent.
+"""
+import argparse
+import json
+import sys
+
+COLUMNS = (
+    ("p50_ms", False),
+    ("p99_ms", False),
+    ("throughput_rps", True),
+    ("peak_memory_kib", False),
+)
+
+
+def change(base, head):
+    if not base:
+        return 0.0
+    return (head - base) / base * 100
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=10.0, help="allowed regression in percent")
+    args = parser.parse_args()
+
+    with open(args.base) as base_file, open(args.head) as head_file:
+        base, head = json.load(base_file), json.load(head_file)
+
+    for key in ("size", "seed", "iterations", "cache"):
+        if base["meta"].get(key) != head["meta"].get(key):
+            print(f"warning: {key} differs ({base['meta'].get(key)} vs {head['meta'].get(key)})", file=sys.stderr)
+
+    regressions = []
+    print(f"{'scenario':<14}" + "".join(f"{name:>28}" for name, _ in COLUMNS))
+    for scenario in sorted(set(base["scenarios"]) & set(head["scenarios"])):
+        cells = []
+        for name, higher_is_better in COLUMNS:
+            before, after = base["scenarios"][scenario][name], head["scenarios"][scenario][name]
+            delta = change(before, after)
+            cells.append(f"{before:>10.1f} -> {after:>8.1f} {delta:>+6.1f}%")
+            worse = -delta if higher_is_better else delta
+            if name in ("p99_ms", "throughput_rps") and worse > args.threshold:
+                regressions.append(f"{scenario} {name} {delta:+.1f}%")
+        print(f"{scenario:<14}" + "".join(f"{cell:>28}" for cell in cells))
+
+    if regressions:
+        print("regressions: " + ", ".join(regressions), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Seeded generator of synthetic building footprints clustered around cities.
+
+    python benchmarks/generator.py buildings.geojsonl --count 100000 --seed 42
+
+The same seed and count always give the same GeoJSONL file, which import_buildings can load.
+"""
+import argparse
+import json
+import sys
+from math import cos, radians
+
+import numpy as np
+
+# name, longitude, latitude, relative weight
+CITIES = (
+    ("Москва", 37.6173, 55.7558, 12.0),
+    ("Санкт-Петербург", 30.3351, 59.9343, 6.0),
+    ("Ростов-на-Дону", 39.7015, 47.2357, 3.0),
+    ("Новосибирск", 82.9204, 55.0302, 2.5),
+    ("Екатеринбург", 60.6057, 56.8389, 2.5),
+    ("Казань", 49.1221, 55.7887, 2.0),
+    ("Краснодар", 38.9760, 45.0355, 1.5),
+    ("Владивосток", 131.8869, 43.1155, 1.0),
+)
+METERS_PER_DEGREE = 111320
+CITY_SPREAD_METERS = 6000
+CHUNK_SIZE = 10000
+# share of footprints by shape: rectangles, small polygons (5-19 vertices), detailed polygons (20-199 vertices)
+SHAPE_WEIGHTS = (0.7, 0.25, 0.05)
+
+
+def generate_buildings(count, seed=0, cities=CITIES, chunk_size=CHUNK_SIZE):
+    """Yields (address, ring) with ring a closed list of [longitude, latitude] pairs."""
+    rng = np.random.default_rng(seed)
+    weights = np.array([city[3] for city in cities])
+    weights /= weights.sum()
+
+    number = 0
+    for start in range(0, count, chunk_size):
+        size = min(chunk_size, count - start)
+        city_indexes = rng.choice(len(cities), size=size, p=weights)
+        offsets = rng.normal(0, CITY_SPREAD_METERS, size=(size, 2))
+        radiuses = np.clip(rng.lognormal(np.log(12), 0.5, size=size), 3, 150)
+        shapes = rng.choice(3, size=size, p=SHAPE_WEIGHTS)
+        rotations = rng.uniform(0, np.pi, size=size)
+
+        for city_index, (dx, dy), radius, shape, rotation in zip(city_indexes, offsets, radiuses, shapes, rotations):
+            name, longitude, latitude, _ = cities[city_index]
+            meters_per_degree_lon = METERS_PER_DEGREE * cos(radians(latitude))
+            center_x = longitude + dx / meters_per_degree_lon
+            center_y = latitude + dy / METERS_PER_DEGREE
+
+            if shape == 0:
+                angles = rotation + np.array([0.25, 0.75, 1.25, 1.75]) * np.pi
+                distances = np.full(4, radius)
+            else:
+                vertices = rng.integers(5, 20) if shape == 1 else rng.integers(20, 200)
+                # increasing angles around the centre give a star shaped, hence simple, polygon
+                gaps = rng.uniform(0.5, 1.5, size=vertices)
+                angles = rotation + np.cumsum(gaps) / gaps.sum() * 2 * np.pi
+                distances = radius * rng.uniform(0.6, 1.0, size=vertices)
+
+            xs = center_x + distances * np.cos(angles) / meters_per_degree_lon
+            ys = center_y + distances * np.sin(angles) / METERS_PER_DEGREE
+            ring = np.column_stack([xs, ys]).round(8).tolist()
+            ring.append(ring[0])
+
+            number += 1
+            yield f"{name}, ул. Синтетическая, {number}", ring
+
+
+def iter_geojsonl(count, seed=0):
+    for address, ring in generate_buildings(count, seed):
+        feature = {
+            "type": "Feature",
+            "geometry": {"type": "Polygon", "coordinates": [ring]},
+            "properties": {"address": address},
+        }
+        yield json.dumps(feature, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def write_geojsonl(path, count, seed=0):
+    with open(path, "w", encoding="utf-8") as output:
+        output.writelines(iter_geojsonl(count, seed))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("path", help="output GeoJSONL file, '-' writes to stdout")
+    parser.add_argument("--count", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.path == "-":
+        sys.stdout.writelines(iter_geojsonl(args.count, args.seed))
+    else:
+        write_geojsonl(args.path, args.count, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""End-to-end benchmark of the buildings API against a local PostGIS.
+
+    python benchmarks/run.py --size 100000 --seed 42 --output results.json
+    python benchmarks/compare.py base.json results.json
+
+A throwaway test database is created next to the configured one (the same credentials as for
+`manage.py test`) and filled with a seeded synthetic dataset, --keepdb reuses it between runs when
+it was generated with the same --size and --seed. Requests go through the full Django stack in
+process (django.test.Client), without network I/O. Each scenario runs --iterations timed requests,
+then a shorter pass under tracemalloc for peak memory. The buildings added by the create and bulk
+scenarios are deleted after each of them, so every scenario sees the same dataset.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "server.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+import numpy as np  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.db.models import Max  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+
+from api_buldings.cache import response_cache  # noqa: E402
+from api_buldings.models import Building, BuildingChange  # noqa: E402
+from generator import CITIES, generate_buildings, write_geojsonl  # noqa: E402
+
+SCENARIOS = ("list", "area_filter", "radius_filter", "retrieve", "create", "bulk")
+MUTATING_SCENARIOS = ("create", "bulk")
+DATASET_TABLE = "benchmark_dataset"
+LIST_PAGE_SIZE = 1000
+BULK_SIZE = 100
+MEMORY_ITERATIONS = 10
+
+
+class Scenarios:
+    def __init__(self, client, seed):
+        self.client = client
+        self.rng = np.random.default_rng(seed)
+        self.ids = np.array(Building.objects.values_list("pk", flat=True))
+        self.new_buildings = generate_buildings(10 ** 7, seed + 1)
+
+    def random_point(self):
+        _, longitude, latitude, _ = CITIES[self.rng.integers(len(CITIES))]
+        return longitude + self.rng.normal(0, 0.03), latitude + self.rng.normal(0, 0.03)
+
+    def next_feature(self):
+        address, ring = next(self.new_buildings)
+        return {"type": "Feature", "geometry": {"type": "Polygon", "coordinates": [ring]},
+                "properties": {"address": address}}
+
+    def list(self):
+        return self.client.get("/api/buildings/", {"page_size": LIST_PAGE_SIZE}), 200
+
+    def area_filter(self):
+        low = float(self.rng.uniform(50, 1000))
+        params = {"min_area": low, "max_area": low * 1.5, "page_size": LIST_PAGE_SIZE}
+        return self.client.get("/api/buildings/", params), 200
+
+    def radius_filter(self):
+        longitude, latitude = self.random_point()
+        params = {"longitude": longitude, "latitude": latitude, "max_distance": 500}
+        return self.client.get("/api/buildings/", params), 200
+
+    def retrieve(self):
+        return self.client.get(f"/api/buildings/{self.rng.choice(self.ids)}/"), 200
+
+    def create(self):
+        return self.client.post("/api/buildings/", self.next_feature(), content_type="application/json"), 201
+
+    def bulk(self):
+        features = [self.next_feature() for _ in range(BULK_SIZE)]
+        return self.client.post("/api/buildings/bulk/", features, content_type="application/json"), 200
+
+
+def run_scenario(scenarios, name, iterations, warmup, use_cache):
+    request = getattr(scenarios, name)
+
+    def call():
+        if not use_cache:
+            response_cache.invalidate()
+        response, expected = request()
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        return response.status_code != expected
+
+    for _ in range(warmup):
+        call()
+
+    errors = 0
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        request_started = time.perf_counter()
+        errors += call()
+        latencies.append(time.perf_counter() - request_started)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    for _ in range(min(iterations, MEMORY_ITERATIONS)):
+        call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies = np.array(latencies) * 1e3
+    return {
+        "iterations": iterations,
+        "errors": errors,
+        "mean_ms": round(float(latencies.mean()), 3),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+        "throughput_rps": round(iterations / elapsed, 2),
+        "peak_memory_kib": round(peak / 1024, 1),
+    }
+
+
+def quote_table(model):
+    return connection.ops.quote_name(model._meta.db_table)
+
+
+def load_dataset(size, seed, workers):
+    # The dataset table records what the buildings were generated with, it is written after a complete import.
+    with connection.cursor() as cursor:
+        cursor.execute(f"CREATE TABLE IF NOT EXISTS {DATASET_TABLE} (size integer NOT NULL, seed bigint NOT NULL)")
+        cursor.execute(f"SELECT size, seed FROM {DATASET_TABLE}")
+        if cursor.fetchall() == [(size, seed)] and Building.objects.count() == size:
+            return False
+        cursor.execute(f"TRUNCATE {DATASET_TABLE}, {quote_table(Building)}, {quote_table(BuildingChange)} "
+                       "RESTART IDENTITY")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "buildings.geojsonl")
+        write_geojsonl(path, size, seed)
+        call_command("import_buildings", path, workers=workers, stdout=open(os.devnull, "w"))
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {DATASET_TABLE} (size, seed) VALUES (%s, %s)", [size, seed])
+        cursor.execute(f"ANALYZE {quote_table(Building)}")
+    return True
+
+
+def get_high_water_marks():
+    return (Building.objects.aggregate(latest=Max("pk", default=0))["latest"],
+            BuildingChange.objects.aggregate(latest=Max("pk", default=0))["latest"])
+
+
+def restore_dataset(high_water_marks):
+    # only new buildings are written by the mutating scenarios
+    building_id, change_id = high_water_marks
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {quote_table(Building)} WHERE id > %s", [building_id])
+        cursor.execute(f"DELETE FROM {quote_table(BuildingChange)} WHERE id > %s", [change_id])
+    response_cache.invalidate()
+
+
+def get_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=Path(__file__).resolve().parent).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=10000, help="number of buildings in the dataset")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="import_buildings validation processes")
+    parser.add_argument("--cache", action="store_true", help="keep the response cache between requests")
+    parser.add_argument("--keepdb", action="store_true", help="reuse the benchmark database between runs")
+    parser.add_argument("--output", help="write results to this JSON file instead of stdout")
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=args.keepdb, serialize=False)
+    try:
+        load_started = time.perf_counter()
+        loaded = load_dataset(args.size, args.seed, args.workers)
+        load_time = time.perf_counter() - load_started
+
+        scenarios = Scenarios(Client(), args.seed)
+        high_water_marks = get_high_water_marks()
+        results = {}
+        for name in args.scenarios:
+            results[name] = run_scenario(scenarios, name, args.iterations, args.warmup, args.cache)
+            if name in MUTATING_SCENARIOS:
+                restore_dataset(high_water_marks)
+            print(f"{name:<14} p50 {results[name]['p50_ms']:>9.2f} ms  p99 {results[name]['p99_ms']:>9.2f} ms  "
+                  f"{results[name]['throughput_rps']:>8.1f} req/s  peak {results[name]['peak_memory_kib']:>9.1f} KiB",
+                  file=sys.stderr)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=args.keepdb)
+
+    report = {
+        "meta": {
+            "revision": get_revision(),
+            "size": args.size,
+            "seed": args.seed,
+            "iterations": args.iterations,
+            "cache": args.cache,
+            "load_seconds": round(load_time, 2) if loaded else None,
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "platform": platform.platform(),
+        },
+        "scenarios": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
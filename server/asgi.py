@@ -12,5 +12,8 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "server.settings")
+# Under ASGI every sync request may run in a different thread and each thread keeps its own connection,
+# persistent connections would pile up until CONN_MAX_AGE, so they are closed after each request.
+os.environ.setdefault("CONN_MAX_AGE_DB", "0")
 
 application = get_asgi_application()
@@ -0,0 +1,3 @@
+# DJANGO_SETTINGS_MODULE=server.settings gives the development profile,
+# deployments use server.settings.production.
+from server.settings.base import *  # noqa: F401,F403
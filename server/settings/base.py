@@ -0,0 +1,208 @@
+"""
+Django settings for server project.
+
+Generated by 'django-admin startproject' using Django 5.0.5.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/5.0/topics/settings/
+
+For the full list of settings and their values, see
+https://docs.djangoproject.com/en/5.0/ref/settings/
+"""
+import os
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+# Build paths inside the project like this: BASE_DIR / 'subdir'.
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+
+load_dotenv(BASE_DIR / ".env")
+
+
+# Quick-start development settings - unsuitable for production
+# See https://docs.djangoproject.com/en/5.0/howto/deployment/checklist/
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = os.getenv("SECRET_KEY", "django-insecure-t4)r0c&g2i3%92bb7_sl=mybh-9c7&a4eqn0zk@mt6hg&8)#9y")
+
+# SECURITY WARNING: don't run with debug turned on in production!
+DEBUG = os.getenv("DEBUG", "1").lower() in ("1", "true", "yes")
+
+ALLOWED_HOSTS = os.getenv("ALLOWED_HOSTS", "127.0.0.1").split(",")
+
+# django.contrib.gis loads the GDAL and GEOS libraries with ctypes during django.setup() (the geometry
+# model fields import them), from these paths or, when unset, from the standard library locations
+# (ctypes.util.find_library). The osgeo Python bindings are not imported at startup, only by
+# `export_buildings --format fgb`.
+GDAL_LIBRARY_PATH = os.getenv("GDAL_LIBRARY_PATH") or os.getenv("GDAL_LIBRARY")
+GEOS_LIBRARY_PATH = os.getenv("GEOS_LIBRARY_PATH")
+
+# OSGeo4W installs (Windows) keep the libraries, GDAL data and PROJ database under one root.
+OSGEO4W = os.getenv("OSGEO4W")
+if OSGEO4W:
+    OSGEO4W_ROOT = Path(OSGEO4W)
+    os.environ.setdefault("OSGEO4W_ROOT", str(OSGEO4W_ROOT))
+    os.environ.setdefault("GDAL_DATA", str(OSGEO4W_ROOT / "share" / "gdal"))
+    os.environ.setdefault("PROJ_LIB", str(OSGEO4W_ROOT / "share" / "proj"))
+    os.environ["PATH"] = str(OSGEO4W_ROOT / "bin") + os.pathsep + os.environ.get("PATH", "")
+    # Python 3.8+ on Windows no longer resolves dependent DLLs through PATH.
+    if hasattr(os, "add_dll_directory") and (OSGEO4W_ROOT / "bin").is_dir():
+        os.add_dll_directory(str(OSGEO4W_ROOT / "bin"))
+
+# Application definition
+
+INSTALLED_APPS = [
+    "django.contrib.admin",
+    "django.contrib.auth",
+    "django.contrib.contenttypes",
+    "django.contrib.sessions",
+    "django.contrib.messages",
+    "django.contrib.staticfiles",
+    "api_buldings",
+    "rest_framework",
+    "django.contrib.gis"
+]
+
+MIDDLEWARE = [
+    "api_buldings.instrumentation.InstrumentationMiddleware",
+    "api_buldings.replicas.ReplicaStickinessMiddleware",
+    "django.middleware.security.SecurityMiddleware",
+    "django.contrib.sessions.middleware.SessionMiddleware",
+    "django.middleware.common.CommonMiddleware",
+    "django.middleware.csrf.CsrfViewMiddleware",
+    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "django.contrib.messages.middleware.MessageMiddleware",
+    "django.middleware.clickjacking.XFrameOptionsMiddleware",
+]
+
+ROOT_URLCONF = "server.urls"
+
+TEMPLATES = [
+    {
+        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "DIRS": [],
+        "APP_DIRS": True,
+        "OPTIONS": {
+            "context_processors": [
+                "django.template.context_processors.debug",
+                "django.template.context_processors.request",
+                "django.contrib.auth.context_processors.auth",
+                "django.contrib.messages.context_processors.messages",
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = "server.wsgi.application"
+
+
+# Database
+# https://docs.djangoproject.com/en/5.0/ref/settings/#databases
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.contrib.gis.db.backends.postgis',
+        'NAME': os.getenv("NAME_DB"),
+        'USER': os.getenv("USER_DB"),
+        'PASSWORD': os.getenv("PASSWORD_DB"),
+        'HOST': os.getenv("HOST_DB"),
+        'PORT': os.getenv("PORT_DB"),
+        # Persistent connections, checked before reuse so a restarted server doesn't fail the next request.
+        # For WSGI workers only: server/asgi.py defaults CONN_MAX_AGE_DB to 0.
+        'CONN_MAX_AGE': int(os.getenv("CONN_MAX_AGE_DB", "60")),
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+
+# Read replicas as "host:port,host:port", same database and credentials as the primary.
+# list and retrieve read from a random replica, writes and everything else use the primary.
+for index, replica in enumerate(filter(None, os.getenv("REPLICA_HOSTS_DB", "").split(","))):
+    host, _, port = replica.partition(":")
+    DATABASES[f"replica_{index}"] = {
+        **DATABASES["default"],
+        'HOST': host,
+        'PORT': port or DATABASES["default"]["PORT"],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ["api_buldings.replicas.PrimaryReplicaRouter"]
+
+BUILDINGS_READ_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+# After a write the client reads from the primary for this long (replication lag allowance).
+BUILDINGS_REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", "5"))
+
+
+# Password validation
+# https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
+    },
+    {
+        "NAME": "django.contrib.auth.password_validation.MinimumLengthValidator",
+    },
+    {
+        "NAME": "django.contrib.auth.password_validation.CommonPasswordValidator",
+    },
+    {
+        "NAME": "django.contrib.auth.password_validation.NumericPasswordValidator",
+    },
+]
+
+
+# Internationalization
+# https://docs.djangoproject.com/en/5.0/topics/i18n/
+
+LANGUAGE_CODE = "en-us"
+
+TIME_ZONE = "UTC"
+
+USE_I18N = True
+
+USE_TZ = True
+
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/5.0/howto/static-files/
+
+STATIC_URL = "static/"
+
+# Default primary key field type
+# https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
+
+DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+# Cache of rendered building responses, keyed by action and normalized query parameters.
+# BACKEND is "local" (per-process LRU), "database" (per-process LRU, invalidated by the latest
+# BuildingChange), "django" (uses CACHES[ALIAS]) or a dotted path.
+# "local" can't guarantee fresh responses across processes: a write or an import_buildings run
+# invalidates only the process that made it, other workers serve their entries until TIMEOUT.
+# It suits a single runserver process, deployments use "database" (production profile) or "django"
+# with a shared cache (Redis, Memcached).
+
+BUILDINGS_RESPONSE_CACHE = {
+    "BACKEND": "local",
+    "MAX_ENTRIES": 256,
+    "TIMEOUT": 300,
+}
+
+# Addresses or networks allowed to read /api/metrics/ (staff users always can). Behind a reverse proxy
+# REMOTE_ADDR is the proxy, so restrict the path there as well.
+BUILDINGS_METRICS_ALLOWED_IPS = os.getenv("METRICS_ALLOWED_IPS", "127.0.0.1,::1").split(",")
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "api_buldings.instrumentation": {
+            "handlers": ["console"],
+            "level": os.getenv("BUILDINGS_REQUEST_LOG_LEVEL", "INFO"),
+            "propagate": False,
+        },
+    },
+}
@@ -0,0 +1,14 @@
+import os
+
+from server.settings.base import *  # noqa: F401,F403
+
+DEBUG = False
+
+SECRET_KEY = os.environ["SECRET_KEY"]
+
+ALLOWED_HOSTS = os.environ["ALLOWED_HOSTS"].split(",")
+
+BUILDINGS_RESPONSE_CACHE = {**BUILDINGS_RESPONSE_CACHE, "BACKEND": "database"}  # noqa: F405
+
+SESSION_COOKIE_SECURE = os.getenv("SECURE_COOKIES", "1").lower() in ("1", "true", "yes")
+CSRF_COOKIE_SECURE = SESSION_COOKIE_SECURE